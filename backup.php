@@ -1,11 +1,45 @@
 <?php
-require_once __DIR__ . '/config.php';
+require_once __DIR__ . '/db.php';
 require_login();
-$dest = __DIR__ . '/backup/' . 'backup_' . date('Ymd_His') . '.sqlite';
-if (copy(DB_FILE, $dest)) {
+
+$dir = __DIR__ . '/backup';
+if (!is_dir($dir)) {
+    mkdir($dir, 0700, true);
+}
+// work files get a per-request name, so backups started in the same second never share
+// (or delete) each other's files; the finished .gz is renamed to the dated name
+$name = 'backup_' . date('Ymd_His');
+$tmp = $dir . '/' . $name . '_' . uniqid('', true) . '.sqlite';
+$part = $tmp . '.gz';
+$dest = $dir . '/' . $name . '.sqlite.gz';
+try {
+    // VACUUM INTO copies from a single read snapshot instead of the live file
+    $db = get_db();
+    $db->exec('VACUUM INTO ' . $db->quote($tmp));
+    $snap = new PDO('sqlite:' . $tmp);
+    $check = $snap->query('PRAGMA quick_check')->fetchColumn();
+    $snap = null;
+    if ($check !== 'ok') {
+        throw new RuntimeException('integrity check failed: ' . $check);
+    }
+    $in = fopen($tmp, 'rb');
+    $out = gzopen($part, 'wb6');
+    if ($in === false || $out === false) {
+        throw new RuntimeException('cannot open ' . ($in === false ? $tmp : $part));
+    }
+    while (!feof($in)) {
+        gzwrite($out, fread($in, 65536));
+    }
+    fclose($in);
+    if (!gzclose($out) || !rename($part, $dest)) {
+        throw new RuntimeException('cannot write ' . $dest);
+    }
     echo 'Backup saved to ' . basename($dest);
-} else {
+} catch (Throwable $e) {
+    @unlink($part);
     http_response_code(500);
     echo 'Backup failed';
+} finally {
+    @unlink($tmp);
 }
 ?>
\ No newline at end of file
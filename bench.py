@@ -0,0 +1,233 @@
+# Query benchmark for the generated app (stdlib sqlite3 only)
+#
+#   python bench.py                                   10k / 100k / 1M posts, results to bench_results.json
+#   python bench.py --sizes 10000 --baseline bench_baseline.json
+#   python bench.py --save-baseline bench_baseline.json
+#
+# Builds schema.sql from the generated app (running test.py first if it is missing) into a
+# temp database, seeds it through datatool.py with synth.py rows, times the SQL that api.php
+# and the exports issue and checks each query plan. Exit status: 2 when a plan is not the expected
+# one (an index regression), 1 when timings regressed against the baseline, else 0.
+import argparse, json, os, platform, re, sqlite3, statistics, subprocess, sys, tempfile, time
+from datetime import date, datetime, timedelta
+
+import datatool
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+APP_DIR = "/mnt/data/solo-creator-app"
+
+
+def generate_schema(app_dir, regen):
+    if regen or not os.path.exists(os.path.join(app_dir, "schema.sql")):
+        subprocess.run([sys.executable, os.path.join(HERE, "test.py")], check=True, cwd=HERE)
+
+
+def seed(path, app_dir, n, seed_value):
+    """n posts, n/5 ideas and n/5 todos (see synth.py), loaded the way datatool.py imports.
+
+    Triggers stay on, so changes, posts_fts and the rollup are filled as the app fills them."""
+    conn = datatool.connect(path, app_dir)
+    writer = datatool.Writer(conn, 5000)
+    datatool.import_synthetic(writer, n, seed_value)
+    writer.finish()
+    conn.close()
+
+
+# The SQL of api.php / export_*.php with representative parameters. Keep in step with the
+# PHP when a query changes there. plan: substrings every EXPLAIN QUERY PLAN must contain;
+# forbid: regexes it must not match.
+POST_COLS = "p.*, s.name as series_name"
+POSTS_FROM = "FROM posts p LEFT JOIN series s ON s.id = p.series_id WHERE 1=1"
+POSTS_ORDER = " ORDER BY p.sort_at ASC, p.id ASC LIMIT 101"
+TAG_FILTER = " AND p.id IN (SELECT post_id FROM post_tags WHERE tag_id = (SELECT id FROM tags WHERE name = ?))"
+FTS_SELECT = (f"SELECT {POST_COLS}, highlight(posts_fts, 0, char(2), char(3)) as title_hl, "
+              "snippet(posts_fts, 1, char(2), char(3), '…', 16) as snippet FROM posts_fts "
+              "JOIN posts p ON p.id = posts_fts.rowid LEFT JOIN series s ON s.id = p.series_id WHERE posts_fts MATCH ?")
+NO_SORT = [r"TEMP B-TREE"]
+
+
+def queries(today, week_start):
+    week_end = (date.fromisoformat(week_start) + timedelta(days=6)).isoformat()
+    month = date.fromisoformat(today).replace(day=1)
+    month_end = ((month + timedelta(days=32)).replace(day=1) - timedelta(days=1)).isoformat()
+    return {
+        "posts_list": dict(sql=f"SELECT {POST_COLS} {POSTS_FROM}{POSTS_ORDER}", params=[],
+                           plan=["idx_posts_sort"], forbid=NO_SORT),
+        "posts_list.platform": dict(sql=f"SELECT {POST_COLS} {POSTS_FROM} AND p.platform = ?{POSTS_ORDER}",
+                                    params=["tiktok"], plan=["idx_posts_platform_sort"], forbid=NO_SORT),
+        "posts_list.status": dict(sql=f"SELECT {POST_COLS} {POSTS_FROM} AND p.status = ?{POSTS_ORDER}",
+                                  params=["scheduled"], plan=["idx_posts_status_sort"], forbid=NO_SORT),
+        "posts_list.platform_status": dict(
+            sql=f"SELECT {POST_COLS} {POSTS_FROM} AND p.platform = ? AND p.status = ?{POSTS_ORDER}",
+            params=["instagram", "published"], plan=["idx_posts_platform_status_sort"], forbid=NO_SORT),
+        "posts_list.platform_page2": dict(
+            sql=f"SELECT {POST_COLS} {POSTS_FROM} AND p.platform = ? AND (p.sort_at, p.id) > (?, ?){POSTS_ORDER}",
+            params=["tiktok", today, 0], plan=["idx_posts_platform_sort (platform=? AND sort_at>?)"], forbid=NO_SORT),
+        "posts_list.tag_rare": dict(
+            sql=f"SELECT {POST_COLS} {POSTS_FROM}{TAG_FILTER} AND +p.platform = ?{POSTS_ORDER}",
+            params=["tag299", "tiktok"], plan=["USING INTEGER PRIMARY KEY (rowid=?)", "post_tags USING PRIMARY KEY (tag_id=?)"],
+            forbid=[r"SCAN p\b", r"idx_posts_"]),
+        "posts_list.tag_common": dict(
+            sql=f"SELECT {POST_COLS} {POSTS_FROM}{TAG_FILTER}{POSTS_ORDER}",
+            params=["tag0"], plan=["post_tags USING PRIMARY KEY (tag_id=?)"], forbid=[r"SCAN p\b"]),
+        "posts_list.search": dict(sql=FTS_SELECT + " ORDER BY posts_fts.rank LIMIT 101 OFFSET 0",
+                                  params=['"kamera"* "live"*'], plan=["VIRTUAL TABLE INDEX"], forbid=[r"SCAN p\b"]),
+        "posts_range": dict(
+            sql="SELECT id, title, platform, status, publish_at FROM posts WHERE publish_at >= ? "
+                "AND publish_at < date(?, '+1 day') ORDER BY publish_at ASC LIMIT 5000",
+            params=[month.isoformat(), month_end], plan=["idx_posts_publish_at (publish_at>? AND publish_at<?)"],
+            forbid=NO_SORT),
+        "dashboard.upcoming": dict(
+            sql="SELECT id, title, platform, status, publish_at FROM posts WHERE publish_at >= ? ORDER BY publish_at LIMIT 5",
+            params=[today], plan=["idx_posts_publish_at"], forbid=NO_SORT),
+        "dashboard.todos": dict(
+            sql="SELECT id, title, due_date, status FROM todos WHERE status = 'open' "
+                "ORDER BY COALESCE(due_date, created_at) LIMIT 5",
+            params=[], plan=["idx_todos_status_due (status=?)"], forbid=NO_SORT),
+        "dashboard.status_counts": dict(sql="SELECT status, SUM(cnt) FROM posts_daily_rollup GROUP BY status",
+                                        params=[], plan=["posts_daily_rollup"], forbid=[r"\bposts\b"]),
+        "tags_facets": dict(
+            sql="SELECT t.name, COUNT(*) as cnt FROM post_tags pt JOIN tags t ON t.id = pt.tag_id "
+                "GROUP BY pt.tag_id ORDER BY cnt DESC, t.name LIMIT 50",
+            params=[], plan=["SCAN pt"], forbid=[r"\bposts\b"]),
+        "tags_facets.platform": dict(
+            sql="SELECT t.name, COUNT(*) as cnt FROM post_tags pt JOIN tags t ON t.id = pt.tag_id "
+                "JOIN posts p ON p.id = pt.post_id WHERE p.platform = ? GROUP BY pt.tag_id ORDER BY cnt DESC, t.name LIMIT 50",
+            params=["youtube_long"], plan=["idx_post_tags_post (post_id=?)"], forbid=[r"SCAN p\b"]),
+        "report_weekly": dict(
+            sql="SELECT platform, status, SUM(cnt) as cnt FROM posts_daily_rollup "
+                "WHERE day BETWEEN date(?) AND date(?) GROUP BY platform, status",
+            params=[week_start, week_end], plan=["posts_daily_rollup USING PRIMARY KEY (day>? AND day<?)"],
+            forbid=[r"\bposts\b"]),
+        "report_series_effectiveness": dict(
+            sql="SELECT s.name as series, x.status, x.cnt FROM (SELECT r.series_id, r.status, SUM(r.cnt) as cnt "
+                "FROM posts_daily_rollup r WHERE 1=1 GROUP BY r.series_id, r.status) x "
+                "LEFT JOIN series s ON s.id = NULLIF(x.series_id, 0) ORDER BY s.name",
+            params=[], plan=["SCAN r"], forbid=[r"\bposts\b"]),
+        "changes_since": dict(
+            sql=f"SELECT {POST_COLS} FROM changes c JOIN posts p ON p.id = c.row_id LEFT JOIN series s ON s.id = p.series_id "
+                "WHERE c.tbl = ? AND c.rev > ? AND c.deleted = 0",
+            params=["posts", 10 ** 9], plan=["idx_changes_tbl_rev (tbl=? AND rev>?)"], forbid=[r"SCAN p\b"]),
+        "ideas_list": dict(sql="SELECT * FROM ideas ORDER BY created_at DESC", params=[],
+                           plan=["idx_ideas_created"], forbid=NO_SORT),
+        "todos_list": dict(sql="SELECT * FROM todos ORDER BY COALESCE(due_date, created_at) ASC", params=[],
+                           plan=["idx_todos_due"], forbid=NO_SORT),
+        "export_csv": dict(
+            sql="SELECT id, platform, title, description, publish_at, status, tags, series_id FROM posts ORDER BY id ASC",
+            params=[], plan=["SCAN posts"], forbid=NO_SORT),
+        "export_ics.window": dict(
+            sql="SELECT p.id, p.title, p.publish_at, p.platform, "
+                "(SELECT c.rev FROM changes c WHERE c.tbl = 'posts' AND c.row_id = p.id) as rev FROM posts p "
+                "WHERE p.publish_at IS NOT NULL AND +p.status IN ('scheduled','published') "
+                "AND p.publish_at >= date(?, ?) AND p.publish_at < date(?, ?) ORDER BY p.publish_at ASC",
+            params=[today, "-30 days", today, "+90 days"],
+            plan=["idx_posts_publish_at (publish_at>? AND publish_at<?)", "idx_changes_row (tbl=? AND row_id=?)"],
+            forbid=NO_SORT),
+    }
+
+
+def check_plan(conn, name, q):
+    plan = [r[3] for r in conn.execute("EXPLAIN QUERY PLAN " + q["sql"], q["params"])]
+    text = "\n".join(plan)
+    problems = [f"missing '{s}'" for s in q["plan"] if s not in text]
+    problems += [f"matches /{r}/" for r in q["forbid"] if re.search(r, text)]
+    return plan, problems
+
+
+def time_query(conn, q, repeat):
+    """Median wall time in ms over `repeat` runs (after one warm-up), fetching every row."""
+    rows = len(conn.execute(q["sql"], q["params"]).fetchall())
+    samples = []
+    for _ in range(repeat):
+        t = time.perf_counter()
+        conn.execute(q["sql"], q["params"]).fetchall()
+        samples.append((time.perf_counter() - t) * 1000)
+    return {"ms": round(statistics.median(samples), 3), "max_ms": round(max(samples), 3), "rows": rows}
+
+
+def run_size(app_dir, n, repeat, seed_value):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.sqlite")
+        t = time.perf_counter()
+        seed(path, app_dir, n, seed_value)
+        seeded = time.perf_counter() - t
+        conn = sqlite3.connect(path)
+        today = date.today().isoformat()
+        week_start = (date.today() - timedelta(days=date.today().weekday())).isoformat()
+        results, failures = {}, {}
+        for name, q in queries(today, week_start).items():
+            plan, problems = check_plan(conn, name, q)
+            results[name] = time_query(conn, q, repeat)
+            if problems:
+                failures[name] = {"problems": problems, "plan": plan}
+        conn.close()
+    return {"seed_s": round(seeded, 2), "queries": results}, failures
+
+
+def compare(base, cur, threshold, min_ms):
+    """(size, query, old, new) where the median grew by more than threshold and min_ms."""
+    out = []
+    for size, res in cur.items():
+        old = base.get(size, {}).get("queries", {})
+        for name, r in res["queries"].items():
+            b = old.get(name)
+            if b and r["ms"] > b["ms"] * (1 + threshold) and r["ms"] - b["ms"] > min_ms:
+                out.append((size, name, b["ms"], r["ms"]))
+    return out
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Benchmark the app's SQL on synthetic data")
+    ap.add_argument("--sizes", default="10000,100000,1000000", help="comma-separated post counts")
+    ap.add_argument("--repeat", type=int, default=5, help="timed runs per query")
+    ap.add_argument("--seed", type=int, default=1, help="random seed for the synthetic data")
+    ap.add_argument("--app", default=APP_DIR, help="generated app directory (schema.sql)")
+    ap.add_argument("--regen", action="store_true", help="run test.py even if schema.sql exists")
+    ap.add_argument("--out", default="bench_results.json")
+    ap.add_argument("--baseline", help="earlier results to compare against")
+    ap.add_argument("--save-baseline", help="also write the results to this file")
+    ap.add_argument("--threshold", type=float, default=0.25, help="relative slowdown that counts as a regression")
+    ap.add_argument("--min-ms", type=float, default=0.5, help="ignore slowdowns smaller than this")
+    args = ap.parse_args(argv)
+
+    generate_schema(args.app, args.regen)
+    report = {"meta": {"created": datetime.now().isoformat(timespec="seconds"), "sqlite": sqlite3.sqlite_version,
+                       "python": platform.python_version(), "machine": platform.machine(), "repeat": args.repeat},
+              "sizes": {}}
+    plan_failures = {}
+    for n in [int(x) for x in args.sizes.split(",") if x]:
+        print(f"== {n} posts", flush=True)
+        res, failures = run_size(args.app, n, args.repeat, args.seed)
+        report["sizes"][str(n)] = res
+        print(f"   seeded in {res['seed_s']} s")
+        for name, r in res["queries"].items():
+            flag = "  PLAN" if name in failures else ""
+            print(f"   {name:<32}{r['ms']:>10.2f} ms{r['rows']:>8} rows{flag}")
+        if failures:
+            plan_failures[str(n)] = failures
+
+    report["plan_failures"] = plan_failures
+    for path in filter(None, [args.out, args.save_baseline]):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    status = 0
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            base = json.load(f)["sizes"]
+        regressions = compare(base, report["sizes"], args.threshold, args.min_ms)
+        for size, name, old, cur in regressions:
+            print(f"REGRESSION {size} {name}: {old:.2f} ms -> {cur:.2f} ms")
+        if regressions:
+            status = 1
+    for size, failures in plan_failures.items():
+        for name, f in failures.items():
+            print(f"PLAN {size} {name}: {'; '.join(f['problems'])}")
+            for line in f["plan"]:
+                print(f"     {line}")
+        status = 2
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
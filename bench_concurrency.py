@@ -0,0 +1,148 @@
+# Reader/writer concurrency benchmark for the SQLite connection profile (stdlib only)
+#
+#   python bench_concurrency.py                       10k posts, 4 readers + 2 writers, 5 s per profile
+#   python bench_concurrency.py --posts 100000 --readers 8 --writers 2 --seconds 10 --out conc.json
+#
+# Seeds one database as bench.py does, then runs the same mixed load against it twice: with
+# the settings db() used before the connection profile (rollback journal, synchronous=FULL,
+# PDO's 60 s busy timeout) and with the profile db_profile() applies from the DB_* constants
+# in config.php. Every reader and writer is a process with its own connection, like a PHP
+# request. Readers run the report, dashboard and list queries of bench.py; writers do
+# kanban-style status updates in a transaction. Reports ops/s, latency percentiles and the
+# operations that failed with SQLITE_BUSY/locked per role.
+import argparse, json, multiprocessing, os, re, sqlite3, sys, tempfile, time
+from datetime import date, timedelta
+
+import bench
+
+STATUSES = ["idea", "in_production", "ready", "scheduled", "published"]
+# whole-table exports are not what runs next to a status update
+READ_SKIP = ("export_",)
+# db() before the profile: SQLite defaults plus PDO's ATTR_TIMEOUT (60 s)
+BASELINE = {"journal_mode": "DELETE", "synchronous": "FULL", "busy_timeout": 60000}
+
+
+def config_profile(app_dir, db_bytes):
+    """The pragmas db_profile() sets, from config.php, with the same size rules."""
+    with open(os.path.join(app_dir, "config.php"), encoding="utf-8") as f:
+        consts = dict(re.findall(r"const (DB_\w+) = ([^;]+);", f.read()))
+    val = lambda k: consts[k].strip().strip("'")
+    mmap = min(int(val("DB_MMAP_MAX")), max(16 << 20, 2 * db_bytes))
+    cache_kb = min(int(val("DB_CACHE_MAX_KB")), max(2048, db_bytes // 1024))
+    return {"busy_timeout": int(val("DB_BUSY_TIMEOUT_MS")), "journal_mode": val("DB_JOURNAL_MODE"),
+            "synchronous": val("DB_SYNCHRONOUS"), "wal_autocheckpoint": int(val("DB_WAL_AUTOCHECKPOINT")),
+            "mmap_size": mmap, "cache_size": -cache_kb}
+
+
+def connect(path, profile):
+    conn = sqlite3.connect(path, isolation_level=None, timeout=0)
+    for key, value in profile.items():
+        conn.execute(f"PRAGMA {key} = {value}")
+    conn.execute("PRAGMA foreign_keys = ON")
+    return conn
+
+
+def busy(e):
+    return "locked" in str(e) or "busy" in str(e)
+
+
+def worker(role, idx, path, profile, start, stop, out):
+    conn = connect(path, profile)
+    today = date.today()
+    week_start = today - timedelta(days=today.weekday())
+    reads = [q for name, q in bench.queries(today.isoformat(), week_start.isoformat()).items()
+             if not name.startswith(READ_SKIP)]
+    max_id = conn.execute("SELECT MAX(id) FROM posts").fetchone()[0]
+    lat, failed, i = [], 0, idx
+    while time.time() < start:
+        time.sleep(0.001)
+    while time.time() < stop:
+        i += 1
+        t = time.perf_counter()
+        try:
+            if role == "read":
+                q = reads[i % len(reads)]
+                conn.execute(q["sql"], q["params"]).fetchall()
+            else:
+                conn.execute("BEGIN")
+                conn.execute("UPDATE posts SET status = ?, updated_at = datetime('now') WHERE id = ?",
+                             (STATUSES[i % len(STATUSES)], (i * 7919) % max_id + 1))
+                conn.execute("COMMIT")
+        except sqlite3.OperationalError as e:
+            if not busy(e):
+                raise
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            failed += 1
+            continue
+        lat.append((time.perf_counter() - t) * 1000)
+    conn.close()
+    out.put((role, lat, failed))
+
+
+def pct(values, p):
+    s = sorted(values)
+    return s[min(len(s) - 1, int(p / 100 * len(s)))] if s else 0.0
+
+
+def run(path, profile, readers, writers, seconds):
+    # journal_mode is stored in the file: set it once before the workers start
+    connect(path, {"busy_timeout": 5000, "journal_mode": profile["journal_mode"]}).close()
+    out = multiprocessing.Queue()
+    start = time.time() + 0.5
+    procs = [multiprocessing.Process(target=worker, args=(role, i, path, profile, start, start + seconds, out))
+             for i, role in enumerate(["read"] * readers + ["write"] * writers)]
+    for p in procs:
+        p.start()
+    results = [out.get() for _ in procs]
+    for p in procs:
+        p.join()
+    stats = {}
+    for role in ("read", "write"):
+        lat = [ms for r, l, _ in results if r == role for ms in l]
+        stats[role] = {"ops": len(lat), "ops_s": round(len(lat) / seconds, 1),
+                       "p50": round(pct(lat, 50), 2), "p95": round(pct(lat, 95), 2), "p99": round(pct(lat, 99), 2),
+                       "busy": sum(f for r, _, f in results if r == role)}
+    return stats
+
+
+def print_stats(name, profile, stats):
+    print(f"== {name}: " + ", ".join(f"{k}={v}" for k, v in profile.items()))
+    print(f"   {'role':<6}{'ops/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'busy':>8}")
+    for role, st in stats.items():
+        print(f"   {role:<6}{st['ops_s']:>10.1f}{st['p50']:>10.2f}{st['p95']:>10.2f}{st['p99']:>10.2f}{st['busy']:>8}")
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Reader/writer throughput before and after the connection profile")
+    ap.add_argument("--posts", type=int, default=10000)
+    ap.add_argument("--readers", type=int, default=4)
+    ap.add_argument("--writers", type=int, default=2)
+    ap.add_argument("--seconds", type=float, default=5, help="load duration per profile")
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--app", default=bench.APP_DIR, help="generated app directory (schema.sql, config.php)")
+    ap.add_argument("--regen", action="store_true", help="run test.py even if schema.sql exists")
+    ap.add_argument("--out", help="write the results as JSON")
+    args = ap.parse_args(argv)
+
+    bench.generate_schema(args.app, args.regen)
+    report = {"posts": args.posts, "readers": args.readers, "writers": args.writers, "seconds": args.seconds}
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "conc.sqlite")
+        bench.seed(path, args.app, args.posts, args.seed)
+        profiles = {"baseline": BASELINE, "profile": config_profile(args.app, os.path.getsize(path))}
+        for name, profile in profiles.items():
+            stats = run(path, profile, args.readers, args.writers, args.seconds)
+            print_stats(name, profile, stats)
+            report[name] = {"pragmas": profile, "stats": stats}
+    for role in ("read", "write"):
+        before, after = report["baseline"]["stats"][role]["ops_s"], report["profile"]["stats"][role]["ops_s"]
+        print(f"{role}: {before:.1f} -> {after:.1f} ops/s" + (f" (x{after / before:.1f})" if before else ""))
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,230 @@
+# Bulk import/export for the app database (stdlib only)
+#
+#   python datatool.py import posts.csv                  CSV in the export_csv.php layout
+#   python datatool.py import backup_rev0-812.jsonl.gz   JSONL: backup.php?since lines or plain rows (--table)
+#   python datatool.py import --synthetic 100000         generated posts, series, ideas and todos
+#   python datatool.py export -o posts.csv               same layout as export_csv.php
+#   python datatool.py export --format jsonl --table all -o dump.jsonl
+#
+# Rows go in with one prepared statement per chunk (executemany) and one transaction per
+# chunk, in WAL mode with synchronous=OFF for the import connection only. The app's
+# triggers stay on (changes log, FTS, rollup); post_tags is filled for the imported posts
+# afterwards, in chunks, with the same split as post_tags_rebuild() in db.php.
+import argparse, csv, gzip, io, json, os, random, re, sqlite3, sys
+
+APP_DIR = "/mnt/data/solo-creator-app"
+# same order as SYNC_TABLES in db.php: referenced tables first
+SYNC_TABLES = ["series", "templates", "posts", "ideas", "todos"]
+CSV_COLUMNS = ["id", "platform", "title", "description", "publish_at", "status", "tags", "series_id"]
+# empty CSV cells that mean NULL rather than ''
+NULLABLE = {"id", "publish_at", "series_id", "due_date"}
+
+TAG_SPLIT = """WITH RECURSIVE split(post_id, tag, rest) AS (
+    SELECT id, '', tags || ',' FROM posts WHERE tags <> '' AND id IN (SELECT id FROM temp.imported WHERE id BETWEEN ? AND ?)
+    UNION ALL
+    SELECT post_id, trim(substr(rest, 1, instr(rest, ',') - 1)), substr(rest, instr(rest, ',') + 1)
+    FROM split WHERE rest <> ''
+)"""
+
+
+def connect(path, app_dir=APP_DIR):
+    """Open (creating from schema.sql if new) the database for a bulk write."""
+    is_new = not os.path.exists(path)
+    conn = sqlite3.connect(path, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA foreign_keys = ON")
+    with open(os.path.join(app_dir, "schema.sql"), encoding="utf-8") as f:
+        schema = f.read()
+    if is_new:
+        conn.executescript(schema)
+    else:
+        # the app upgrades an older database on first use; bulk writes assume the current schema
+        want = int(re.search(r"PRAGMA user_version = (\d+)", schema).group(1))
+        have = conn.execute("PRAGMA user_version").fetchone()[0]
+        if have < want:
+            raise SystemExit(f"{path} is at schema version {have}, the app at {want}: run `php migrate.php` first")
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = OFF")
+    conn.execute("CREATE TEMP TABLE IF NOT EXISTS imported (id INTEGER PRIMARY KEY)")
+    return conn
+
+
+def writable_columns(conn, table):
+    # table_xinfo marks generated columns (posts.sort_at) as hidden
+    return {r["name"] for r in conn.execute(f"PRAGMA table_xinfo({table})") if r["hidden"] == 0}
+
+
+class Writer:
+    """Buffers upserts/deletes per (table, op, columns) and writes each full chunk in its own transaction."""
+
+    def __init__(self, conn, chunk):
+        self.conn, self.chunk = conn, chunk
+        self.key, self.buf = None, []
+        self.columns = {t: writable_columns(conn, t) for t in SYNC_TABLES}
+        self.counts = {}
+        self.max_post_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM posts").fetchone()[0]
+
+    def upsert(self, table, row):
+        if table not in self.columns:
+            raise SystemExit(f"unknown table: {table}")
+        row = {k: (None if v == "" and k in NULLABLE else v) for k, v in row.items() if k in self.columns[table]}
+        self._add((table, "upsert", tuple(row)), tuple(row.values()))
+
+    def delete(self, table, row_id):
+        self._add((table, "delete", ("id",)), (row_id,))
+
+    def _add(self, key, values):
+        if key != self.key or len(self.buf) >= self.chunk:
+            self.flush()
+            self.key = key
+        self.buf.append(values)
+
+    def flush(self):
+        if not self.buf:
+            return
+        table, op, cols = self.key
+        if op == "delete":
+            sql = f"DELETE FROM {table} WHERE id = ?"
+        elif "id" in cols:
+            # an upsert, not REPLACE: REPLACE deletes without firing the delete triggers
+            updates = ", ".join(f"{c} = excluded.{c}" for c in cols if c != "id")
+            sql = (f"INSERT INTO {table} ({', '.join(cols)}) VALUES ({', '.join('?' * len(cols))}) "
+                   f"ON CONFLICT(id) DO UPDATE SET {updates}")
+        else:
+            sql = f"INSERT INTO {table} ({', '.join(cols)}) VALUES ({', '.join('?' * len(cols))})"
+        self.conn.execute("BEGIN")
+        try:
+            self.conn.executemany(sql, self.buf)
+            if table == "posts" and op == "upsert" and "id" in cols:
+                self.conn.executemany("INSERT OR IGNORE INTO temp.imported (id) VALUES (?)",
+                                      ((v[cols.index("id")],) for v in self.buf if v[cols.index("id")] is not None))
+            self.conn.execute("COMMIT")
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        self.counts[(table, op)] = self.counts.get((table, op), 0) + len(self.buf)
+        self.buf = []
+
+    def finish(self):
+        self.flush()
+        self.conn.execute("INSERT OR IGNORE INTO temp.imported (id) SELECT id FROM posts WHERE id > ?", (self.max_post_id,))
+        rebuild_post_tags(self.conn, self.chunk)
+
+
+def rebuild_post_tags(conn, chunk):
+    """Refresh post_tags for the posts in temp.imported, chunk ids per transaction."""
+    ids = [r[0] for r in conn.execute("SELECT id FROM temp.imported ORDER BY id")]
+    for i in range(0, len(ids), chunk):
+        lo, hi = ids[i], ids[min(i + chunk, len(ids)) - 1]
+        conn.execute("BEGIN")
+        conn.execute("DELETE FROM post_tags WHERE post_id IN (SELECT id FROM temp.imported WHERE id BETWEEN ? AND ?)", (lo, hi))
+        conn.execute(f"INSERT OR IGNORE INTO tags (name) {TAG_SPLIT} SELECT tag FROM split WHERE tag <> '' ORDER BY post_id", (lo, hi))
+        conn.execute(f"INSERT OR IGNORE INTO post_tags (tag_id, post_id) {TAG_SPLIT} "
+                     "SELECT t.id, s.post_id FROM split s JOIN tags t ON t.name = s.tag", (lo, hi))
+        conn.execute("COMMIT")
+    conn.execute("DELETE FROM temp.imported")
+
+
+def open_text(path):
+    if path == "-":
+        return io.TextIOWrapper(sys.stdin.buffer, encoding="utf-8", newline="")
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8", newline="")
+    return open(path, encoding="utf-8", newline="")
+
+
+def import_file(writer, path, table):
+    with open_text(path) as f:
+        if (path[:-3] if path.endswith(".gz") else path).endswith(".csv"):
+            for row in csv.DictReader(f):
+                writer.upsert(table, row)
+            return
+        for line in f:
+            if not line.strip():
+                continue
+            rec = json.loads(line)
+            if "op" in rec:
+                # backup.php?since=... / export --format jsonl lines
+                if rec["op"] == "delete":
+                    writer.delete(rec["tbl"], rec["id"])
+                else:
+                    writer.upsert(rec["tbl"], rec["row"])
+            elif "tbl" not in rec and "since" not in rec:
+                writer.upsert(table, rec)
+
+
+def import_synthetic(writer, n, seed):
+    import synth
+    rng = random.Random(seed)
+    for row in synth.series(rng, max(10, n // 2000)):
+        writer.upsert("series", row)
+    writer.flush()
+    series_ids = [r[0] for r in writer.conn.execute("SELECT id FROM series")]
+    for row in synth.posts(rng, n, series_ids):
+        writer.upsert("posts", row)
+    for row in synth.ideas(rng, n // 5):
+        writer.upsert("ideas", row)
+    for row in synth.todos(rng, n // 5):
+        writer.upsert("todos", row)
+
+
+def export(conn, fmt, table, out):
+    if fmt == "csv":
+        if table != "posts":
+            raise SystemExit("CSV export covers posts only (the export_csv.php layout)")
+        w = csv.writer(out, lineterminator="\n")
+        w.writerow(CSV_COLUMNS)
+        for r in conn.execute(f"SELECT {', '.join(CSV_COLUMNS)} FROM posts ORDER BY id ASC"):
+            w.writerow(["" if v is None else v for v in r])
+        return
+    for tbl in (SYNC_TABLES if table == "all" else [table]):
+        for r in conn.execute(f"SELECT * FROM {tbl} ORDER BY id"):
+            row = {k: r[k] for k in r.keys() if k != "sort_at"}
+            out.write(json.dumps({"tbl": tbl, "op": "upsert", "row": row}, ensure_ascii=False) + "\n")
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Bulk import/export for the app database")
+    ap.add_argument("--db", default=os.path.join(APP_DIR, "data.sqlite"))
+    ap.add_argument("--app", default=APP_DIR, help="app directory with schema.sql (used for a new database)")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    imp = sub.add_parser("import", help="load CSV/JSONL files or synthetic data")
+    imp.add_argument("files", nargs="*", help=".csv, .jsonl (optionally .gz) or - for stdin JSONL")
+    imp.add_argument("--table", default="posts", help="target table for CSV and plain JSONL rows")
+    imp.add_argument("--synthetic", type=int, metavar="N", help="generate N posts (+ series, N/5 ideas, N/5 todos)")
+    imp.add_argument("--seed", type=int, default=1)
+    imp.add_argument("--chunk", type=int, default=5000, help="rows per executemany/transaction")
+    exp = sub.add_parser("export", help="write posts as CSV, or tables as JSONL")
+    exp.add_argument("--format", choices=["csv", "jsonl"], default="csv")
+    exp.add_argument("--table", default="posts", help="table to export, or 'all' (JSONL)")
+    exp.add_argument("-o", "--output", default="-")
+    args = ap.parse_args(argv)
+
+    conn = connect(args.db, args.app)
+    if args.cmd == "export":
+        out = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8", newline="")
+        with out:
+            export(conn, args.format, args.table, out)
+        return 0
+
+    if not args.files and not args.synthetic:
+        ap.error("import needs files or --synthetic N")
+    writer = Writer(conn, args.chunk)
+    try:
+        for path in args.files:
+            import_file(writer, path, args.table)
+        if args.synthetic:
+            import_synthetic(writer, args.synthetic, args.seed)
+        writer.finish()
+    except sqlite3.IntegrityError as e:
+        # chunks already committed stay; e.g. posts referring to series not imported yet
+        raise SystemExit(f"import stopped: {e} (in a {writer.key[1]} chunk of {writer.key[0]}; import referenced rows first)")
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    conn.execute("PRAGMA optimize")
+    for (table, op), n in sorted(writer.counts.items()):
+        print(f"{table:<10} {op:<7} {n}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -20,7 +20,7 @@ function init_db(PDO $db): void {
         platform TEXT,
         title TEXT,
         description TEXT,
-        publish_date TEXT,
+        publish_at TEXT,
         status TEXT,
         tags TEXT,
         series_id INTEGER
@@ -45,7 +45,7 @@ function init_db(PDO $db): void {
     $db->exec("CREATE TABLE IF NOT EXISTS templates (
         id INTEGER PRIMARY KEY AUTOINCREMENT,
         name TEXT,
-        weekdays TEXT,
+        days_of_week TEXT,
         platforms TEXT
     )");
 }
@@ -0,0 +1,98 @@
+# Aggregate the perf log written by the generated app (logs/perf.log, one JSON object per request)
+#
+#   python perf_report.py logs/perf.log [logs/perf.log.1 ...]        per-action latency table
+#   python perf_report.py new.log --baseline old.log                  flag p95/p99 regressions
+#
+# With --baseline the exit status is 1 when any action regressed, so it can gate a deploy.
+import argparse, json, math, sys
+from collections import defaultdict
+
+PHASES = ["connect", "session", "sql", "respond"]
+
+
+def load(paths):
+    """Requests grouped by action; unreadable lines (e.g. a torn last write) are skipped."""
+    by_action = defaultdict(list)
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    continue
+                by_action[rec.get("action") or "?"].append(rec)
+    return by_action
+
+
+def pct(values, p):
+    """Nearest-rank percentile of an unsorted list."""
+    if not values:
+        return 0.0
+    s = sorted(values)
+    return s[max(0, math.ceil(p / 100 * len(s)) - 1)]
+
+
+def summarize(recs):
+    ms = [r.get("ms", 0) for r in recs]
+    row = {
+        "n": len(recs),
+        "p50": pct(ms, 50), "p95": pct(ms, 95), "p99": pct(ms, 99),
+        "queries": sum(r.get("queries", 0) for r in recs) / len(recs),
+        "rows": sum(r.get("rows", 0) for r in recs) / len(recs),
+        "kb": sum(r.get("bytes", 0) for r in recs) / len(recs) / 1024,
+        "errors": sum(1 for r in recs if (r.get("status") or 200) >= 400),
+    }
+    for ph in PHASES:
+        row[ph] = pct([r.get("phases", {}).get(ph, 0) for r in recs], 95)
+    return row
+
+
+def print_table(stats):
+    cols = ["n", "p50", "p95", "p99", "queries", "rows", "kb", "errors"] + [f"{ph}95" for ph in PHASES]
+    width = max([len("action")] + [len(a) for a in stats])
+    print("action".ljust(width) + "".join(c.rjust(10) for c in cols))
+    for action, st in sorted(stats.items(), key=lambda kv: -kv[1]["p95"]):
+        vals = [st["n"], st["p50"], st["p95"], st["p99"], st["queries"], st["rows"], st["kb"], st["errors"]]
+        vals += [st[ph] for ph in PHASES]
+        print(action.ljust(width) + "".join(
+            (f"{v:10d}" if isinstance(v, int) else f"{v:10.1f}") for v in vals))
+
+
+def compare(base, new, threshold, min_n):
+    """Actions whose p95 or p99 grew by more than threshold (relative) with enough samples."""
+    found = []
+    for action, st in sorted(new.items()):
+        old = base.get(action)
+        if not old or old["n"] < min_n or st["n"] < min_n:
+            continue
+        for key in ("p95", "p99"):
+            if old[key] > 0 and st[key] > old[key] * (1 + threshold):
+                found.append((action, key, old[key], st[key]))
+    return found
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Per-action latency report for the app perf log")
+    ap.add_argument("logs", nargs="+", help="perf log files (rotated parts may be listed together)")
+    ap.add_argument("--baseline", nargs="+", help="log files of the reference run to compare against")
+    ap.add_argument("--threshold", type=float, default=0.2, help="relative p95/p99 growth that counts as a regression")
+    ap.add_argument("--min-samples", type=int, default=20, help="ignore actions with fewer requests on either side")
+    args = ap.parse_args(argv)
+
+    stats = {a: summarize(r) for a, r in load(args.logs).items()}
+    print_table(stats)
+    if not args.baseline:
+        return 0
+    base = {a: summarize(r) for a, r in load(args.baseline).items()}
+    regressions = compare(base, stats, args.threshold, args.min_samples)
+    print()
+    if not regressions:
+        print("no regressions against baseline")
+        return 0
+    for action, key, old, cur in regressions:
+        print(f"REGRESSION {action} {key}: {old:.1f} ms -> {cur:.1f} ms (+{(cur / old - 1) * 100:.0f}%)")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
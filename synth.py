@@ -0,0 +1,67 @@
+# Synthetic rows for the app's tables, shared by bench.py and datatool.py.
+#
+# Distributions: platforms weighted towards short video, most posts published in the last
+# two years, scheduled ones in the next three months, ideas/in-production often undated,
+# 40% of posts in a series, 0-4 tags per post from a long-tailed (1/rank) tag set.
+import itertools
+from datetime import date, timedelta
+
+PLATFORMS = {"instagram": 35, "tiktok": 30, "youtube_short": 20, "youtube_long": 15}
+STATUSES = {"idea": 15, "in_production": 10, "ready": 5, "scheduled": 15, "published": 55}
+WORDS = ("vlog tutorial recenzja unboxing poradnik kulisy montaż światło kamera mikrofon "
+         "podróż kuchnia trening plan rozmowa nagranie seria odcinek pytania live").split()
+TAGS = [f"tag{i}" for i in range(300)]
+TAG_CUM_WEIGHTS = list(itertools.accumulate(1 / (i + 1) for i in range(len(TAGS))))
+
+
+def stamp(day):
+    return f"{day.isoformat()} 12:00:00"
+
+
+def series(rng, count):
+    for i in range(count):
+        yield {"name": f"Seria {i + 1}", "description": " ".join(rng.sample(WORDS, 5))}
+
+
+def posts(rng, n, series_ids=(), today=None):
+    today = today or date.today()
+    platforms, platform_w = list(PLATFORMS), list(PLATFORMS.values())
+    statuses, status_w = list(STATUSES), list(STATUSES.values())
+    for _ in range(n):
+        status = rng.choices(statuses, status_w)[0]
+        if status == "published":
+            day = today - timedelta(days=rng.randint(0, 730))
+        elif status == "scheduled":
+            day = today + timedelta(days=rng.randint(0, 90))
+        else:
+            day = today + timedelta(days=rng.randint(-30, 60)) if rng.random() < 0.4 else None
+        tags = sorted(set(rng.choices(range(len(TAGS)), cum_weights=TAG_CUM_WEIGHTS, k=rng.randint(0, 4))))
+        created = stamp((day or today) - timedelta(days=rng.randint(1, 30)))
+        yield {
+            "platform": rng.choices(platforms, platform_w)[0],
+            "title": " ".join(rng.sample(WORDS, 4)).capitalize(),
+            "description": " ".join(rng.choices(WORDS, k=30)),
+            "publish_at": f"{day.isoformat()}T{rng.randint(7, 21):02d}:{rng.choice(['00', '30'])}" if day else None,
+            "status": status,
+            "tags": ", ".join(TAGS[t] for t in tags),
+            "series_id": rng.choice(series_ids) if series_ids and rng.random() < 0.4 else None,
+            "created_at": created,
+            "updated_at": created,
+        }
+
+
+def ideas(rng, n, today=None):
+    today = today or date.today()
+    for _ in range(n):
+        created = stamp(today - timedelta(days=rng.randint(0, 365)))
+        yield {"title": " ".join(rng.sample(WORDS, 3)).capitalize(), "description": " ".join(rng.choices(WORDS, k=12)),
+               "category": rng.choice(["edu", "fun", "news", "behind"]), "created_at": created, "updated_at": created}
+
+
+def todos(rng, n, today=None):
+    today = today or date.today()
+    for _ in range(n):
+        created = stamp(today - timedelta(days=rng.randint(0, 365)))
+        yield {"title": " ".join(rng.sample(WORDS, 3)).capitalize(), "description": "",
+               "due_date": (today + timedelta(days=rng.randint(-60, 30))).isoformat() if rng.random() < 0.7 else None,
+               "status": "done" if rng.random() < 0.7 else "open", "created_at": created, "updated_at": created}
@@ -1,15 +1,99 @@
-# Recreate project files cleanly (fixing previous error) and zip them
-import os, shutil, zipfile, datetime, textwrap, pathlib
+# Generate the project files into base and zip them
+#
+#   python test.py           write only the files that changed, drop ones no longer generated, update the zip
+#   python test.py --check   compare what would be generated with what is on disk; writes nothing,
+#                            exit status 1 when anything differs
+#
+# Files are collected in `files` and synced at the end. base/.manifest.json lists what the last
+# run generated (sha256 per file): files that are no longer generated are removed, anything else
+# in base (data.sqlite, logs/, .app_secret.php) is left alone. The zip has sorted entries with
+# fixed timestamps, so the same sources always give the same bytes.
+import argparse, difflib, inspect, io, json, os, re, gzip, hashlib, shutil, subprocess, sys, tempfile, zipfile, datetime, textwrap, pathlib
+
+ap = argparse.ArgumentParser(description="Generate the Solo Creator app")
+ap.add_argument("--check", action="store_true", help="report differences from disk without writing")
+args = ap.parse_args()
 
 base = "/mnt/data/solo-creator-app"
-if os.path.exists(base):
-    shutil.rmtree(base)
-os.makedirs(f"{base}/assets", exist_ok=True)
-
-# schema.sql
-open(f"{base}/schema.sql","w").write(textwrap.dedent("""
-PRAGMA foreign_keys = ON;
-
+zip_path = "/mnt/data/solo-creator-app.zip"
+MANIFEST = ".manifest.json"
+ZIP_DATE = (1980, 1, 1, 0, 0, 0)
+files = {}
+
+
+def emit(rel, content):
+    files[rel] = content.encode("utf-8") if isinstance(content, str) else content
+
+
+def sha256(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def load_manifest():
+    try:
+        with open(os.path.join(base, MANIFEST), encoding="utf-8") as f:
+            manifest = json.load(f)
+        return manifest["files"], manifest.get("assets", {})
+    except (OSError, ValueError, KeyError):
+        # no manifest: a directory from an older generator, which wrote assets/app.js and
+        # style.css unfingerprinted; everything under assets/ counts as output so stale files go
+        assets = pathlib.Path(base, "assets")
+        found = sorted(p for p in assets.rglob("*") if p.is_file()) if assets.is_dir() else []
+        return {p.relative_to(base).as_posix(): None for p in found}, {}
+
+
+previous, previous_assets = load_manifest()
+
+
+def previous_output(rel):
+    """Bytes the last run wrote for rel, if the file is still on disk unchanged."""
+    try:
+        data = pathlib.Path(base, rel).read_bytes()
+    except OSError:
+        return None
+    return data if previous.get(rel) == sha256(data) else None
+
+# delta sync: every write to these tables is logged in `changes` (deletes as tombstones);
+# changed_at is set here, a changes table that got the column by ALTER TABLE has no default
+SYNC_TABLES = ["posts", "ideas", "todos", "templates", "series"]
+sync_triggers = "".join(f"""
+CREATE TRIGGER IF NOT EXISTS {t}_changes_ai AFTER INSERT ON {t} BEGIN
+    DELETE FROM changes WHERE tbl = '{t}' AND row_id = NEW.id;
+    INSERT INTO changes (tbl, row_id, deleted, changed_at) VALUES ('{t}', NEW.id, 0, CURRENT_TIMESTAMP);
+END;
+
+CREATE TRIGGER IF NOT EXISTS {t}_changes_au AFTER UPDATE ON {t} BEGIN
+    DELETE FROM changes WHERE tbl = '{t}' AND row_id = NEW.id;
+    INSERT INTO changes (tbl, row_id, deleted, changed_at) VALUES ('{t}', NEW.id, 0, CURRENT_TIMESTAMP);
+END;
+
+CREATE TRIGGER IF NOT EXISTS {t}_changes_ad AFTER DELETE ON {t} BEGIN
+    DELETE FROM changes WHERE tbl = '{t}' AND row_id = OLD.id;
+    INSERT INTO changes (tbl, row_id, deleted, changed_at) VALUES ('{t}', OLD.id, 1, CURRENT_TIMESTAMP);
+END;
+""" for t in SYNC_TABLES)
+
+# Schema migrations, numbered from 1 and applied in order by migrate.php (PRAGMA user_version).
+# schema.sql for a new database is the same statements in one go, so the two cannot drift.
+#   steps:    ("sql", text) | ("rename", table, old, new) | ("add", table, column, decl); renames
+#             and adds only run when the column is (not) there, ALTER TABLE has no IF NOT EXISTS
+#   exists:   object an unversioned database (created from an older schema.sql) already has
+#             when it needs nothing from this migration
+#   backfill: statements run per posts id range (:lo, :hi) for the rows that existed when the
+#             migration ran, one transaction per chunk; the migration's triggers skip the range
+#             still pending and are swapped for the plain ones after the last chunk
+MIGRATIONS = []
+
+
+def migration(name, *steps, exists=None, backfill=None):
+    MIGRATIONS.append({"name": name, "steps": list(steps), "exists": exists, "backfill": backfill})
+
+
+migration("baseline",
+    # the repo-root prototype (db.php, data.sqlite) used these names
+    ("rename", "posts", "publish_date", "publish_at"),
+    ("rename", "templates", "weekdays", "days_of_week"),
+    ("sql", """
 CREATE TABLE IF NOT EXISTS users (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
     email TEXT UNIQUE NOT NULL,
@@ -20,7 +104,8 @@ CREATE TABLE IF NOT EXISTS users (
 CREATE TABLE IF NOT EXISTS series (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
     name TEXT NOT NULL,
-    description TEXT
+    description TEXT,
+    updated_at TEXT DEFAULT CURRENT_TIMESTAMP
 );
 
 CREATE TABLE IF NOT EXISTS posts (
@@ -34,6 +119,7 @@ CREATE TABLE IF NOT EXISTS posts (
     series_id INTEGER,
     created_at TEXT DEFAULT CURRENT_TIMESTAMP,
     updated_at TEXT DEFAULT CURRENT_TIMESTAMP,
+    sort_at TEXT GENERATED ALWAYS AS (COALESCE(publish_at, created_at)) VIRTUAL,
     FOREIGN KEY(series_id) REFERENCES series(id) ON DELETE SET NULL
 );
 
@@ -42,7 +128,8 @@ CREATE TABLE IF NOT EXISTS ideas (
     title TEXT NOT NULL,
     description TEXT,
     category TEXT,
-    created_at TEXT DEFAULT CURRENT_TIMESTAMP
+    created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+    updated_at TEXT DEFAULT CURRENT_TIMESTAMP
 );
 
 CREATE TABLE IF NOT EXISTS todos (
@@ -51,63 +138,1030 @@ CREATE TABLE IF NOT EXISTS todos (
     description TEXT,
     due_date TEXT,
     status TEXT NOT NULL CHECK(status IN ('open','done')) DEFAULT 'open',
-    created_at TEXT DEFAULT CURRENT_TIMESTAMP
+    created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+    updated_at TEXT DEFAULT CURRENT_TIMESTAMP
 );
 
 CREATE TABLE IF NOT EXISTS templates (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
     name TEXT NOT NULL,
     days_of_week TEXT NOT NULL,
-    platforms TEXT NOT NULL
+    platforms TEXT NOT NULL,
+    updated_at TEXT DEFAULT CURRENT_TIMESTAMP
 );
 
 INSERT INTO users (email, password_hash)
 SELECT 'admin@example.com', '$2y$10$wH0CThsoH3CNk1tIQO1xQeGqzq6k2Q7p7FY5w5a6m2NQJdLni5mSa'
 WHERE NOT EXISTS (SELECT 1 FROM users WHERE email='admin@example.com');
-""").strip()+"\n")
+"""),
+    # ALTER TABLE cannot add a CURRENT_TIMESTAMP default; api.php writes these explicitly
+    ("add", "posts", "created_at", "TEXT"),
+    ("add", "posts", "updated_at", "TEXT"),
+    ("add", "todos", "created_at", "TEXT"),
+    # rows from before the columns get the migration time: posts.sort_at and the todos order
+    # fall back to created_at, and a NULL there would end keyset pagination early
+    ("sql", """
+UPDATE posts SET created_at = datetime('now') WHERE created_at IS NULL;
+UPDATE todos SET created_at = datetime('now') WHERE created_at IS NULL;
+"""),
+)
+
+migration("updated_at",
+    *[("add", t, "updated_at", "TEXT") for t in ["series", "ideas", "todos", "templates"]],
+)
+
+migration("posts_sort_at",
+    ("add", "posts", "sort_at", "TEXT GENERATED ALWAYS AS (COALESCE(publish_at, created_at)) VIRTUAL"),
+    ("sql", """
+-- posts_list filters on platform/status and orders by sort_at;
+-- reports range-scan publish_at and group by series_id.
+CREATE INDEX IF NOT EXISTS idx_posts_sort ON posts(sort_at);
+CREATE INDEX IF NOT EXISTS idx_posts_platform_sort ON posts(platform, sort_at);
+CREATE INDEX IF NOT EXISTS idx_posts_status_sort ON posts(status, sort_at);
+CREATE INDEX IF NOT EXISTS idx_posts_platform_status_sort ON posts(platform, status, sort_at);
+CREATE INDEX IF NOT EXISTS idx_posts_publish_at ON posts(publish_at);
+CREATE INDEX IF NOT EXISTS idx_posts_series_status ON posts(series_id, status);
+"""),
+)
+
+migration("changes",
+    ("sql", """
+-- Change log for delta sync: one row per (table, row), re-inserted with a fresh rev on every write
+CREATE TABLE IF NOT EXISTS changes (
+    rev INTEGER PRIMARY KEY AUTOINCREMENT,
+    tbl TEXT NOT NULL,
+    row_id INTEGER NOT NULL,
+    deleted INTEGER NOT NULL DEFAULT 0,
+    changed_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_changes_row ON changes(tbl, row_id);
+CREATE INDEX IF NOT EXISTS idx_changes_tbl_rev ON changes(tbl, rev);
+"""),
+    exists="changes",
+)
+
+migration("posts_fts",
+    ("sql", """
+-- Full-text index over posts (external content, kept in sync by triggers)
+CREATE VIRTUAL TABLE IF NOT EXISTS posts_fts USING fts5(
+    title, description, tags,
+    content='posts', content_rowid='id',
+    tokenize='unicode61 remove_diacritics 2'
+);
+
+CREATE TRIGGER IF NOT EXISTS posts_fts_ai AFTER INSERT ON posts BEGIN
+    INSERT INTO posts_fts(rowid, title, description, tags) VALUES (NEW.id, NEW.title, NEW.description, NEW.tags);
+END;
+
+CREATE TRIGGER IF NOT EXISTS posts_fts_ad AFTER DELETE ON posts BEGIN
+    INSERT INTO posts_fts(posts_fts, rowid, title, description, tags) VALUES ('delete', OLD.id, OLD.title, OLD.description, OLD.tags);
+END;
+
+CREATE TRIGGER IF NOT EXISTS posts_fts_au AFTER UPDATE OF title, description, tags ON posts BEGIN
+    INSERT INTO posts_fts(posts_fts, rowid, title, description, tags) VALUES ('delete', OLD.id, OLD.title, OLD.description, OLD.tags);
+    INSERT INTO posts_fts(rowid, title, description, tags) VALUES (NEW.id, NEW.title, NEW.description, NEW.tags);
+END;
+"""),
+    exists="posts_fts",
+    backfill=["""
+INSERT INTO posts_fts(rowid, title, description, tags)
+SELECT id, title, description, tags FROM posts WHERE id BETWEEN :lo AND :hi
+"""],
+)
+
+migration("posts_daily_rollup",
+    ("sql", """
+-- Daily post counts for the reports, kept current by triggers on posts.
+-- day '' = no publish date, series_id 0 = no series.
+CREATE TABLE IF NOT EXISTS posts_daily_rollup (
+    day TEXT NOT NULL,
+    platform TEXT NOT NULL,
+    status TEXT NOT NULL,
+    series_id INTEGER NOT NULL,
+    cnt INTEGER NOT NULL,
+    PRIMARY KEY (day, platform, status, series_id)
+) WITHOUT ROWID;
+
+CREATE TRIGGER IF NOT EXISTS posts_rollup_ai AFTER INSERT ON posts BEGIN
+    INSERT INTO posts_daily_rollup (day, platform, status, series_id, cnt)
+    VALUES (IFNULL(substr(NEW.publish_at, 1, 10), ''), NEW.platform, NEW.status, IFNULL(NEW.series_id, 0), 1)
+    ON CONFLICT (day, platform, status, series_id) DO UPDATE SET cnt = cnt + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS posts_rollup_ad AFTER DELETE ON posts BEGIN
+    UPDATE posts_daily_rollup SET cnt = cnt - 1
+    WHERE day = IFNULL(substr(OLD.publish_at, 1, 10), '') AND platform = OLD.platform AND status = OLD.status AND series_id = IFNULL(OLD.series_id, 0);
+    DELETE FROM posts_daily_rollup
+    WHERE day = IFNULL(substr(OLD.publish_at, 1, 10), '') AND platform = OLD.platform AND status = OLD.status AND series_id = IFNULL(OLD.series_id, 0) AND cnt <= 0;
+END;
+
+CREATE TRIGGER IF NOT EXISTS posts_rollup_au AFTER UPDATE OF publish_at, platform, status, series_id ON posts BEGIN
+    UPDATE posts_daily_rollup SET cnt = cnt - 1
+    WHERE day = IFNULL(substr(OLD.publish_at, 1, 10), '') AND platform = OLD.platform AND status = OLD.status AND series_id = IFNULL(OLD.series_id, 0);
+    DELETE FROM posts_daily_rollup
+    WHERE day = IFNULL(substr(OLD.publish_at, 1, 10), '') AND platform = OLD.platform AND status = OLD.status AND series_id = IFNULL(OLD.series_id, 0) AND cnt <= 0;
+    INSERT INTO posts_daily_rollup (day, platform, status, series_id, cnt)
+    VALUES (IFNULL(substr(NEW.publish_at, 1, 10), ''), NEW.platform, NEW.status, IFNULL(NEW.series_id, 0), 1)
+    ON CONFLICT (day, platform, status, series_id) DO UPDATE SET cnt = cnt + 1;
+END;
+"""),
+    exists="posts_daily_rollup",
+    backfill=["""
+INSERT INTO posts_daily_rollup (day, platform, status, series_id, cnt)
+SELECT IFNULL(substr(publish_at, 1, 10), ''), platform, status, IFNULL(series_id, 0), COUNT(*)
+FROM posts WHERE id BETWEEN :lo AND :hi GROUP BY 1, 2, 3, 4
+ON CONFLICT (day, platform, status, series_id) DO UPDATE SET cnt = cnt + excluded.cnt
+"""],
+)
+
+TAG_SPLIT = """WITH RECURSIVE split(post_id, tag, rest) AS (
+    SELECT id, '', tags || ',' FROM posts WHERE tags <> '' AND id BETWEEN :lo AND :hi
+    UNION ALL
+    SELECT post_id, trim(substr(rest, 1, instr(rest, ',') - 1)), substr(rest, instr(rest, ',') + 1)
+    FROM split WHERE rest <> ''
+)"""
+
+migration("tags",
+    ("sql", """
+-- Normalized copy of posts.tags (the comma list stays the editable value); api.php keeps it
+-- in step on every write. (tag_id, post_id) serves tag filters, post_id serves re-tagging.
+CREATE TABLE IF NOT EXISTS tags (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL COLLATE NOCASE UNIQUE
+);
+CREATE TABLE IF NOT EXISTS post_tags (
+    tag_id INTEGER NOT NULL REFERENCES tags(id) ON DELETE CASCADE,
+    post_id INTEGER NOT NULL REFERENCES posts(id) ON DELETE CASCADE,
+    PRIMARY KEY (tag_id, post_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_post_tags_post ON post_tags(post_id);
+"""),
+    exists="post_tags",
+    # same split as post_tags_rebuild() in db.php; posts re-tagged meanwhile just match again
+    backfill=[
+        f"INSERT OR IGNORE INTO tags (name) {TAG_SPLIT} SELECT tag FROM split WHERE tag <> '' ORDER BY post_id",
+        f"INSERT OR IGNORE INTO post_tags (tag_id, post_id) {TAG_SPLIT} SELECT t.id, s.post_id FROM split s JOIN tags t ON t.name = s.tag",
+    ],
+)
+
+migration("list_indexes",
+    ("sql", """
+CREATE INDEX IF NOT EXISTS idx_ideas_created ON ideas(created_at);
+-- dashboard: open todos in list order (due date, then creation)
+CREATE INDEX IF NOT EXISTS idx_todos_status_due ON todos(status, COALESCE(due_date, created_at));
+-- todos_list / ideas_list stream in these orders without sorting first
+CREATE INDEX IF NOT EXISTS idx_todos_due ON todos(COALESCE(due_date, created_at));
+"""),
+)
+
+migration("changes_changed_at",
+    # the first changes table had no changed_at (and migration 4 skips a table that exists);
+    # older entries are stamped with the migration time, the triggers write it from now on
+    ("add", "changes", "changed_at", "TEXT"),
+    ("sql", """
+UPDATE changes SET changed_at = CURRENT_TIMESTAMP WHERE changed_at IS NULL;
+""" + "".join(f"DROP TRIGGER IF EXISTS {t}_changes_{op};\n" for t in SYNC_TABLES for op in ("ai", "au", "ad"))
+        + sync_triggers),
+)
+
+SCHEMA_VERSION = len(MIGRATIONS)
+
+
+def backfill_guarded(sql, version):
+    """Trigger definitions that leave the rows still pending in the backfill to the backfill."""
+    def when(m):
+        row = "NEW" if m.group(1) == "INSERT" else "OLD"
+        return (f"{m.group(0)[:-len(' BEGIN')]} WHEN NOT EXISTS (SELECT 1 FROM schema_migrations WHERE version = {version}"
+                f" AND {row}.id > cursor AND {row}.id <= upto) BEGIN")
+    return re.sub(r"AFTER (INSERT|UPDATE|DELETE)\b[^;]*? ON posts BEGIN", when, sql)
+
+
+def php_literal(value, indent=""):
+    """PHP source for a str/list/dict value; multi-line strings (SQL) become nowdocs."""
+    if isinstance(value, str):
+        if "\n" in value:
+            return "<<<'SQL'\n" + value.strip("\n") + "\nSQL"
+        return "'" + value.replace("\\", "\\\\").replace("'", "\\'") + "'"
+    inner = indent + "    "
+    if isinstance(value, dict):
+        items = [f"{inner}{php_literal(k)} => {php_literal(v, inner)}," for k, v in value.items() if v is not None]
+    elif all(isinstance(v, str) and "\n" not in v for v in value):
+        return "[" + ", ".join(php_literal(v) for v in value) + "]"
+    else:
+        items = [f"{inner}{php_literal(v, inner)}," for v in value]
+    return "[\n" + "\n".join(items) + f"\n{indent}]"
+
+
+def migration_php(version, m):
+    steps, finish = [], ""
+    for step in m["steps"]:
+        if step[0] == "sql" and m["backfill"]:
+            # plain triggers once the backfill is done (schema.sql has these from the start)
+            names = re.findall(r"CREATE TRIGGER IF NOT EXISTS (\w+)", step[1])
+            finish += "".join(f"DROP TRIGGER IF EXISTS {n};\n" for n in names) + step[1]
+            step = ("sql", backfill_guarded(step[1], version))
+        steps.append(list(step))
+    out = {"name": m["name"], "exists": m["exists"], "steps": steps}
+    if m["backfill"]:
+        out["backfill"] = {"table": "posts", "sql": [s.strip() for s in m["backfill"]], "finish": finish.strip() + "\n"}
+    return out
+
+
+# schema.sql: a new database gets every migration at once and starts at SCHEMA_VERSION
+emit("schema.sql",
+    "PRAGMA foreign_keys = ON;\n"
+    + "".join(step[1] for m in MIGRATIONS for step in m["steps"] if step[0] == "sql")
+    + f"\nPRAGMA user_version = {SCHEMA_VERSION};\n")
+
+# migrations.php
+emit("migrations.php",
+    "<?php\n// Generated by test.py together with schema.sql; applied by migrate.php\nreturn [\n"
+    + "".join(f"    {v} => {php_literal(migration_php(v, m), '    ')},\n" for v, m in enumerate(MIGRATIONS, 1))
+    + "];\n")
 
 # db.php
-open(f"{base}/db.php","w").write(textwrap.dedent("""
+emit("db.php", textwrap.dedent("""\
 <?php
+require_once __DIR__ . '/perf.php';
+
+// Tables covered by the `changes` log (see changes_since), referenced tables first so
+// incremental backups replay in foreign-key order
+const SYNC_TABLES = ['series', 'templates', 'posts', 'ideas', 'todos'];
+
+// Number of the last migration in migrations.php (PRAGMA user_version once all have run)
+const SCHEMA_VERSION = @SCHEMA_VERSION@;
+
 function db() {
     static $pdo;
     if ($pdo) return $pdo;
     $dbPath = __DIR__ . '/data.sqlite';
     $isNew = !file_exists($dbPath);
-    $pdo = new PDO('sqlite:' . $dbPath, null, null, [
+    $t = hrtime(true);
+    $pdo = new AppPDO('sqlite:' . $dbPath, null, null, [
         PDO::ATTR_ERRMODE => PDO::ERRMODE_EXCEPTION,
-        PDO::ATTR_DEFAULT_FETCH_MODE => PDO::FETCH_ASSOC
+        PDO::ATTR_DEFAULT_FETCH_MODE => PDO::FETCH_ASSOC,
+        PDO::ATTR_PERSISTENT => DB_PERSISTENT
     ]);
-    $pdo->exec("PRAGMA foreign_keys = ON");
+    // statements get the connection so the slow-query log can EXPLAIN them
+    // (persistent PDO instances cannot take a statement class: exec() is timed only)
+    if (!DB_PERSISTENT) $pdo->setAttribute(PDO::ATTR_STATEMENT_CLASS, ['PerfStatement', [$pdo]]);
+    db_profile($pdo, $isNew ? 0 : filesize($dbPath));
+    register_shutdown_function('db_close', $pdo, $dbPath, (int)$pdo->query("SELECT total_changes()")->fetchColumn());
     if ($isNew) {
         $schema = file_get_contents(__DIR__ . '/schema.sql');
         $pdo->exec($schema);
     }
+    // the only check once the schema is current; migrate.php is loaded for an older database
+    if ((int)$pdo->query("PRAGMA user_version")->fetchColumn() !== SCHEMA_VERSION) {
+        require_once __DIR__ . '/migrate.php';
+        migrate($pdo, PHP_SAPI === 'cli' ? null : MIGRATE_BUDGET_MS);
+    }
+    perf_add('connect', perf_ms($t));
     return $pdo;
 }
 
+// Connection profile from config.php, one exec for all pragmas. journal_mode is stored in
+// the database file; the rest lasts as long as the connection. The memory map and page
+// cache follow the size of the database, capped by DB_MMAP_MAX / DB_CACHE_MAX_KB.
+function db_profile(PDO $pdo, $dbBytes) {
+    $mmap = min(DB_MMAP_MAX, max(16 << 20, 2 * $dbBytes));
+    $cacheKb = min(DB_CACHE_MAX_KB, max(2048, intdiv($dbBytes, 1024)));
+    $pdo->exec(implode('; ', [
+        // first, so switching the journal mode waits for other connections too
+        "PRAGMA busy_timeout = " . (int)DB_BUSY_TIMEOUT_MS,
+        "PRAGMA journal_mode = " . DB_JOURNAL_MODE,
+        "PRAGMA synchronous = " . DB_SYNCHRONOUS,
+        "PRAGMA wal_autocheckpoint = " . (int)DB_WAL_AUTOCHECKPOINT,
+        "PRAGMA mmap_size = $mmap",
+        "PRAGMA cache_size = -$cacheKb",
+        "PRAGMA analysis_limit = 400",
+        "PRAGMA foreign_keys = ON",
+    ]));
+}
+
+// Shutdown hook for db(): refresh the planner statistics SQLite considers stale, and
+// truncate a WAL that autocheckpoints could not reset while readers kept it in use.
+// Failures (busy, read-only) are left for a later request.
+function db_close(PDO $pdo, $dbPath, $changes) {
+    try {
+        // a persistent connection must not carry an aborted request's transaction over
+        if ($pdo->inTransaction()) $pdo->rollBack();
+        // statistics only go stale through writes: read-only requests skip it, and it does not
+        // wait for the write lock (ANALYZE needs it), a busy database just defers it
+        if (DB_OPTIMIZE_ON_CLOSE && (int)$pdo->query("SELECT total_changes()")->fetchColumn() > $changes) {
+            $pdo->exec("PRAGMA busy_timeout = 0");
+            try {
+                $pdo->exec("PRAGMA optimize");
+            } finally {
+                $pdo->exec("PRAGMA busy_timeout = " . (int)DB_BUSY_TIMEOUT_MS);
+            }
+        }
+        if (strtoupper(DB_JOURNAL_MODE) === 'WAL' && @filesize($dbPath . '-wal') > DB_WAL_TRUNCATE_BYTES) {
+            $pdo->exec("PRAGMA wal_checkpoint(TRUNCATE)");
+        }
+    } catch (Throwable $e) {
+    }
+}
+
+// Turn free text into an FTS5 query: every word becomes a quoted prefix term.
+function fts_query($q) {
+    preg_match_all('/[\\p{L}\\p{N}_]+/u', $q, $m);
+    $terms = array_map(function ($t) { return '"' . $t . '"*'; }, $m[0]);
+    return implode(' ', $terms);
+}
+
+// Opaque pagination cursor: base64url-encoded JSON
+function cursor_encode($data) {
+    return rtrim(strtr(base64_encode(json_encode($data)), '+/', '-_'), '=');
+}
+
+function cursor_decode($cursor) {
+    $data = json_decode(base64_decode(strtr($cursor ?? '', '-_', '+/')), true);
+    return is_array($data) ? $data : [];
+}
+
 function json_input() {
     $raw = file_get_contents('php://input');
     $data = json_decode($raw, true);
     return is_array($data) ? $data : [];
 }
 
+// Run $fn in a transaction unless one is already open (e.g. inside a batch)
+function tx(PDO $pdo, callable $fn) {
+    if ($pdo->inTransaction()) return $fn();
+    $pdo->beginTransaction();
+    try {
+        $result = $fn();
+        $pdo->commit();
+        return $result;
+    } catch (Throwable $e) {
+        $pdo->rollBack();
+        throw $e;
+    }
+}
+
+// Transaction that holds the write lock from the start, like BEGIN IMMEDIATE. A deferred
+// transaction that read first can fail with SQLITE_BUSY when it later needs to write; the
+// no-op UPDATE takes the lock up front, and PDO still tracks the transaction it opened.
+function begin_write(PDO $pdo) {
+    $pdo->beginTransaction();
+    $pdo->exec("UPDATE changes SET rev = rev WHERE 0");
+}
+
+// Insert many rows with one prepared statement in one transaction; returns the new ids
+function bulk_insert(PDO $pdo, $sql, array $rows) {
+    return tx($pdo, function () use ($pdo, $sql, $rows) {
+        $stmt = $pdo->prepare($sql);
+        $ids = [];
+        foreach ($rows as $row) {
+            $stmt->execute($row);
+            $ids[] = $pdo->lastInsertId();
+        }
+        return $ids;
+    });
+}
+
+// Give a table without change triggers a fresh revision in the changes log (one row_id 0
+// entry), so the ETags of the responses that read it change after a rebuild
+function changes_touch(PDO $pdo, $tbl) {
+    $pdo->prepare("INSERT OR REPLACE INTO changes (tbl, row_id, deleted, changed_at) VALUES (?, 0, 0, CURRENT_TIMESTAMP)")
+        ->execute([$tbl]);
+}
+
+// One-shot backfill of posts_daily_rollup from posts (the triggers keep it current afterwards)
+function rollup_rebuild(PDO $pdo) {
+    tx($pdo, function () use ($pdo) {
+        $pdo->exec("DELETE FROM posts_daily_rollup");
+        $pdo->exec("INSERT INTO posts_daily_rollup (day, platform, status, series_id, cnt)
+                    SELECT IFNULL(substr(publish_at, 1, 10), ''), platform, status, IFNULL(series_id, 0), COUNT(*)
+                    FROM posts
+                    GROUP BY 1, 2, 3, 4");
+        changes_touch($pdo, 'posts_daily_rollup');
+    });
+}
+
+// Split a posts.tags comma list into distinct names (case-insensitive, first spelling wins).
+// strtolower folds ASCII only, as COLLATE NOCASE on tags.name does: "Łódź" and "łódź" are
+// two tags there, so they must stay two names here.
+function tag_names($tags) {
+    $names = [];
+    foreach (explode(',', (string)$tags) as $t) {
+        $t = trim($t);
+        if ($t !== '' && !isset($names[strtolower($t)])) $names[strtolower($t)] = $t;
+    }
+    return array_values($names);
+}
+
+// Replace a post's rows in post_tags with the tags of its comma list
+function post_tags_set(PDO $pdo, $postId, $tags) {
+    tx($pdo, function () use ($pdo, $postId, $tags) {
+        $pdo->prepare("DELETE FROM post_tags WHERE post_id = ?")->execute([$postId]);
+        $add = $pdo->prepare("INSERT OR IGNORE INTO tags (name) VALUES (?)");
+        $link = $pdo->prepare("INSERT OR IGNORE INTO post_tags (tag_id, post_id) SELECT id, ? FROM tags WHERE name = ?");
+        foreach (tag_names($tags) as $name) {
+            $add->execute([$name]);
+            $link->execute([$postId, $name]);
+        }
+    });
+}
+
+// One-shot backfill of tags/post_tags from posts.tags (api.php keeps them current afterwards)
+function post_tags_rebuild(PDO $pdo) {
+    $split = "WITH RECURSIVE split(post_id, tag, rest) AS (
+                  SELECT id, '', tags || ',' FROM posts WHERE tags <> ''
+                  UNION ALL
+                  SELECT post_id, trim(substr(rest, 1, instr(rest, ',') - 1)), substr(rest, instr(rest, ',') + 1)
+                  FROM split WHERE rest <> ''
+              )";
+    tx($pdo, function () use ($pdo, $split) {
+        $pdo->exec("DELETE FROM post_tags");
+        $pdo->exec("INSERT OR IGNORE INTO tags (name) $split SELECT tag FROM split WHERE tag <> '' ORDER BY post_id");
+        $pdo->exec("INSERT OR IGNORE INTO post_tags (tag_id, post_id) $split SELECT t.id, s.post_id FROM split s JOIN tags t ON t.name = s.tag");
+        $pdo->exec("DELETE FROM tags WHERE id NOT IN (SELECT tag_id FROM post_tags)");
+        changes_touch($pdo, 'post_tags');
+    });
+}
+
+// Conditional GET: the ETag is derived from the revisions of the tables a response
+// reads (their newest entry in the changes log), so a matching If-None-Match is
+// answered with 304 before the real query runs.
+function etag_guard(PDO $pdo, $scope, array $tables, array $query = []) {
+    $stmt = $pdo->prepare("SELECT COALESCE(MAX(rev), 0) FROM changes WHERE tbl = ?");
+    $revs = [];
+    foreach ($tables as $tbl) {
+        $stmt->execute([$tbl]);
+        $revs[] = (int)$stmt->fetchColumn();
+    }
+    $seen = in_batch() ? ($query['if_none_match'] ?? '') : ($_SERVER['HTTP_IF_NONE_MATCH'] ?? '');
+    unset($query['action'], $query['csrf'], $query['if_none_match']);
+    ksort($query);
+    $etag = 'W/"' . substr(sha1(json_encode([$scope, $revs, $query])), 0, 20) . '"';
+    response_etag($etag);
+    $fresh = in_array($etag, array_map('trim', explode(',', $seen)), true);
+    if (in_batch()) {
+        if ($fresh) respond(null, 304);
+        return;
+    }
+    header('ETag: ' . $etag);
+    header('Cache-Control: private, no-cache');
+    if ($fresh) {
+        http_response_code(304);
+        exit;
+    }
+}
+
+function response_etag($etag = null) {
+    static $current = null;
+    if ($etag !== null) $current = $etag;
+    return $current;
+}
+
+// While a batch runs, respond() hands each action's result back instead of exiting
+class BatchResponse extends Exception {
+    public $data;
+    public function __construct($data, $code) {
+        parent::__construct('batch_response', $code);
+        $this->data = $data;
+    }
+}
+
+function in_batch($on = null) {
+    static $batch = false;
+    if ($on !== null) $batch = $on;
+    return $batch;
+}
+
+// Write a JSON array row by row from the statement cursor (pdo_sqlite steps the query
+// lazily, nothing is buffered), flushing every STREAM_FLUSH_BYTES. With $limit the
+// statement should yield $limit + 1 rows; the extra one only tells $tail there is more.
+// $tail($lastRow, $more) returns keys written after the array: {"rows":[...], ...}.
+const STREAM_FLUSH_BYTES = 65536;
+
+function respond_stream(PDOStatement $stmt, $limit = null, ?callable $tail = null) {
+    if (in_batch()) {
+        $rows = $stmt->fetchAll();
+        $more = $limit !== null && count($rows) > $limit;
+        if ($more) array_pop($rows);
+        respond($tail ? ['rows' => $rows] + $tail(end($rows) ?: null, $more) : $rows);
+    }
+    while (ob_get_level()) ob_end_flush();
+    http_response_code(200);
+    header('Content-Type: application/json; charset=utf-8');
+    perf_header();
+    // encode/output time only: fetches inside the loop are already counted as sql
+    $t = hrtime(true);
+    $sql0 = perf_state()['phases']['sql'] ?? 0;
+    $bytes = 0;
+    $buf = $tail ? '{"rows":[' : '[';
+    $n = 0;
+    $last = null;
+    $more = false;
+    while ($row = $stmt->fetch()) {
+        if ($limit !== null && $n === $limit) { $more = true; break; }
+        $buf .= ($n++ ? ',' : '') . json_encode($row);
+        $last = $row;
+        if (strlen($buf) >= STREAM_FLUSH_BYTES) {
+            echo $buf;
+            flush();
+            $bytes += strlen($buf);
+            $buf = '';
+        }
+    }
+    $buf .= ']';
+    if ($tail) {
+        foreach ($tail($last, $more) as $k => $v) $buf .= ',' . json_encode((string)$k) . ':' . json_encode($v);
+        $buf .= '}';
+    }
+    echo $buf;
+    perf_count('bytes', $bytes + strlen($buf));
+    perf_add('respond', perf_ms($t) - ((perf_state()['phases']['sql'] ?? 0) - $sql0));
+    exit;
+}
+
 function respond($data, $code=200) {
+    if (in_batch()) throw new BatchResponse($data, $code);
+    $t = hrtime(true);
+    $body = json_encode($data);
+    perf_add('respond', perf_ms($t));
+    perf_count('bytes', strlen($body));
     http_response_code($code);
     header('Content-Type: application/json; charset=utf-8');
-    echo json_encode($data);
+    perf_header();
+    echo $body;
     exit;
 }
 ?>
+""").replace("@SCHEMA_VERSION@", str(SCHEMA_VERSION)))
+
+# migrate.php
+emit("migrate.php", textwrap.dedent("""\
+<?php
+// Schema migrations from migrations.php, keyed on PRAGMA user_version.
+//
+// db() loads this only when user_version is behind SCHEMA_VERSION. Each migration's DDL
+// runs in one short IMMEDIATE transaction; backfills (FTS index, rollup, tags of the rows
+// already there) then walk the posts in MIGRATE_CHUNK id ranges, one transaction per range,
+// so other requests get the write lock in between. A web request spends at most
+// MIGRATE_BUDGET_MS on backfills and the next requests carry on where it stopped;
+// `php migrate.php` runs everything to the end. Progress is kept in schema_migrations.
+require_once __DIR__ . '/db.php';
+
+// true once every migration and backfill is done and user_version is SCHEMA_VERSION
+function migrate(PDO $pdo, $budgetMs = null) {
+    $migrations = require __DIR__ . '/migrations.php';
+    $deadline = $budgetMs === null ? null : hrtime(true) + $budgetMs * 1000000;
+    $pdo->exec("CREATE TABLE IF NOT EXISTS schema_migrations (
+        version INTEGER PRIMARY KEY,
+        name TEXT NOT NULL,
+        applied_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        cursor INTEGER NOT NULL DEFAULT 0,
+        upto INTEGER NOT NULL DEFAULT 0
+    )");
+    // read without the lock first; migrate_apply() checks again inside its transaction
+    $current = (int)$pdo->query("PRAGMA user_version")->fetchColumn();
+    $applied = array_column($pdo->query("SELECT version FROM schema_migrations")->fetchAll(), 'version');
+    foreach ($migrations as $version => $m) {
+        if ($version <= $current || in_array($version, $applied)) continue;
+        migrate_tx($pdo, function () use ($pdo, $version, $m) {
+            migrate_apply($pdo, $version, $m);
+        });
+    }
+    $pending = array_column($pdo->query("SELECT version FROM schema_migrations WHERE cursor < upto ORDER BY version")->fetchAll(), 'version');
+    foreach ($pending as $version) {
+        $m = $migrations[$version];
+        while (migrate_tx($pdo, function () use ($pdo, $version, $m) { return migrate_chunk($pdo, $version, $m); })) {
+            if ($deadline !== null && hrtime(true) > $deadline) return false;
+        }
+    }
+    return migrate_tx($pdo, function () use ($pdo) {
+        if ($pdo->query("SELECT 1 FROM schema_migrations WHERE cursor < upto LIMIT 1")->fetchColumn()) return false;
+        $pdo->exec("PRAGMA user_version = " . SCHEMA_VERSION);
+        return true;
+    });
+}
+
+// BEGIN IMMEDIATE takes the write lock up front: concurrent requests wait on the busy
+// timeout and then see the work done, instead of running the same migration twice
+function migrate_tx(PDO $pdo, callable $fn) {
+    $pdo->exec("BEGIN IMMEDIATE");
+    try {
+        $result = $fn();
+        $pdo->exec("COMMIT");
+        return $result;
+    } catch (Throwable $e) {
+        $pdo->exec("ROLLBACK");
+        throw $e;
+    }
+}
+
+function migrate_apply(PDO $pdo, $version, array $m) {
+    if ((int)$pdo->query("PRAGMA user_version")->fetchColumn() >= $version) return;
+    if ($pdo->query("SELECT 1 FROM schema_migrations WHERE version = " . (int)$version)->fetchAll()) return;
+    // a database created from schema.sql before versioning already has these objects
+    $present = isset($m['exists']) && $pdo->query("SELECT 1 FROM sqlite_master WHERE name = " . $pdo->quote($m['exists']))->fetchAll();
+    $upto = 0;
+    if (!$present) {
+        foreach ($m['steps'] as $step) migrate_step($pdo, $step);
+        if (isset($m['backfill'])) {
+            $upto = (int)$pdo->query("SELECT COALESCE(MAX(id), 0) FROM {$m['backfill']['table']}")->fetchColumn();
+            // nothing to backfill: the plain triggers right away
+            if (!$upto) $pdo->exec($m['backfill']['finish']);
+        }
+    }
+    $pdo->prepare("INSERT INTO schema_migrations (version, name, upto) VALUES (?, ?, ?)")
+        ->execute([$version, $m['name'], $upto]);
+}
+
+function migrate_step(PDO $pdo, array $step) {
+    switch ($step[0]) {
+        case 'sql':
+            $pdo->exec($step[1]);
+            return;
+        case 'rename':
+            [, $table, $old, $new] = $step;
+            $cols = table_columns($pdo, $table);
+            if (in_array($old, $cols, true) && !in_array($new, $cols, true)) {
+                $pdo->exec("ALTER TABLE $table RENAME COLUMN $old TO $new");
+            }
+            return;
+        case 'add':
+            [, $table, $col, $decl] = $step;
+            if (!in_array($col, table_columns($pdo, $table), true)) {
+                $pdo->exec("ALTER TABLE $table ADD COLUMN $col $decl");
+            }
+            return;
+    }
+    throw new InvalidArgumentException("unknown migration step: {$step[0]}");
+}
+
+// table_xinfo also lists generated columns (posts.sort_at); [] for a missing table
+function table_columns(PDO $pdo, $table) {
+    return array_column($pdo->query("PRAGMA table_xinfo($table)")->fetchAll(), 'name');
+}
+
+// One id range of a backfill; true while more ranges are left
+function migrate_chunk(PDO $pdo, $version, array $m) {
+    $rows = $pdo->query("SELECT cursor, upto FROM schema_migrations WHERE version = " . (int)$version)->fetchAll();
+    if (!$rows || $rows[0]['cursor'] >= $rows[0]['upto']) return false;
+    $lo = $rows[0]['cursor'] + 1;
+    $hi = min($rows[0]['cursor'] + MIGRATE_CHUNK, $rows[0]['upto']);
+    foreach ($m['backfill']['sql'] as $sql) {
+        $pdo->prepare($sql)->execute([':lo' => $lo, ':hi' => $hi]);
+    }
+    $pdo->prepare("UPDATE schema_migrations SET cursor = ? WHERE version = ?")->execute([$hi, $version]);
+    if ($hi < $rows[0]['upto']) return true;
+    $pdo->exec($m['backfill']['finish']);
+    return false;
+}
+
+if (PHP_SAPI === 'cli' && realpath($_SERVER['argv'][0] ?? '') === __FILE__) {
+    // db() migrates without a time budget on the command line
+    db();
+    echo "schema version " . SCHEMA_VERSION . "\\n";
+}
+?>
+"""))
+
+# config.php
+emit("config.php", textwrap.dedent("""\
+<?php
+// Authentication mode:
+//   'session' - PHP session, opened read-only so parallel requests never queue on its lock
+//   'token'   - stateless HMAC-signed cookie, CSRF token derived from it, no session files
+const AUTH_MODE = 'session';
+const AUTH_COOKIE = 'sc_auth';
+const AUTH_TOKEN_TTL = 604800; // 7 days
+
+// Request instrumentation (perf.php): Server-Timing header and one JSONL line per request,
+// rotated by size into PERF_LOG.1 .. PERF_LOG.<PERF_LOG_KEEP>
+const PERF_ENABLED = true;
+const PERF_LOG = __DIR__ . '/logs/perf.log';
+const PERF_LOG_MAX_BYTES = 5242880; // 5 MB
+const PERF_LOG_KEEP = 5;
+// Slow-query log: statements taking PERF_SLOW_MS or more (SQL time, fetches included) are
+// written to PERF_SLOW_LOG with their query plan; a PERF_SLOW_SAMPLE share of the faster
+// ones is logged too, so normal plans are on record. PERF_SLOW_MS = null turns it off.
+const PERF_SLOW_MS = 50;
+const PERF_SLOW_SAMPLE = 0.001;
+const PERF_SLOW_LOG = __DIR__ . '/logs/slow.log';
+
+// SQLite connection profile (db_profile() in db.php)
+const DB_JOURNAL_MODE = 'WAL';          // readers and the writer do not block each other
+const DB_SYNCHRONOUS = 'NORMAL';        // with WAL: fsync at checkpoints instead of every commit
+const DB_BUSY_TIMEOUT_MS = 5000;        // wait this long for the write lock before SQLITE_BUSY
+const DB_WAL_AUTOCHECKPOINT = 1000;     // pages in the WAL that trigger a checkpoint on commit
+const DB_WAL_TRUNCATE_BYTES = 67108864; // 64 MB: a bigger WAL is checkpointed and truncated at request end
+const DB_MMAP_MAX = 268435456;          // 256 MB: memory-map the database up to this size (0 = off)
+const DB_CACHE_MAX_KB = 65536;          // page cache per connection: the database size, up to this
+const DB_PERSISTENT = false;            // reuse connections across requests (PDO::ATTR_PERSISTENT)
+const DB_OPTIMIZE_ON_CLOSE = true;      // PRAGMA optimize at the end of requests that wrote
+
+// Schema upgrades (migrate.php): rows per backfill transaction, and how long one web request
+// may spend on backfills before answering (the following requests continue them)
+const MIGRATE_CHUNK = 2000;
+const MIGRATE_BUDGET_MS = 200;
+
+// Signing key: APP_SECRET env var, otherwise generated once into .app_secret.php
+function app_secret() {
+    static $secret;
+    if ($secret) return $secret;
+    $secret = getenv('APP_SECRET') ?: '';
+    if (!$secret) {
+        $file = __DIR__ . '/.app_secret.php';
+        if (!is_file($file) && ($fh = @fopen($file, 'x'))) {
+            fwrite($fh, "<?php return '" . bin2hex(random_bytes(32)) . "';\\n");
+            fclose($fh);
+            @chmod($file, 0600);
+        }
+        $secret = include $file;
+    }
+    return $secret;
+}
+?>
+"""))
+
+# perf.php
+emit("perf.php", textwrap.dedent("""\
+<?php
+require_once __DIR__ . '/config.php';
+
+// Per-request timing. Phases (connect, session, sql, respond) add up here; respond() sends
+// them as Server-Timing and perf_log() appends the request to PERF_LOG at shutdown.
+function &perf_state() {
+    static $state = ['action' => null, 'phases' => [], 'queries' => 0, 'rows' => 0, 'bytes' => 0];
+    return $state;
+}
+
+// Milliseconds since $t0, an hrtime(true) reading
+function perf_ms($t0) {
+    return (hrtime(true) - $t0) / 1e6;
+}
+
+function perf_add($phase, $ms) {
+    $s = &perf_state();
+    $s['phases'][$phase] = ($s['phases'][$phase] ?? 0) + $ms;
+}
+
+function perf_count($key, $n = 1) {
+    $s = &perf_state();
+    $s[$key] += $n;
+}
+
+function perf_action($name) {
+    $s = &perf_state();
+    $s['action'] = $name;
+}
+
+function perf_total_ms() {
+    return (microtime(true) - $_SERVER['REQUEST_TIME_FLOAT']) * 1000;
+}
+
+// Sent by respond()/respond_stream() before the body; covers the phases finished so far
+function perf_header() {
+    if (!PERF_ENABLED || headers_sent()) return;
+    $s = &perf_state();
+    $parts = [];
+    foreach ($s['phases'] as $phase => $ms) $parts[] = sprintf('%s;dur=%.2f', $phase, $ms);
+    $parts[] = sprintf('total;dur=%.2f', perf_total_ms());
+    header('Server-Timing: ' . implode(', ', $parts));
+}
+
+function perf_action_name() {
+    return perf_state()['action'] ?? ($_GET['action'] ?? basename($_SERVER['SCRIPT_NAME'] ?? '', '.php'));
+}
+
+function perf_log() {
+    $s = &perf_state();
+    perf_append(PERF_LOG, json_encode([
+        'ts' => date('c'),
+        'action' => perf_action_name(),
+        'status' => http_response_code(),
+        'ms' => round(perf_total_ms(), 2),
+        'phases' => array_map(function ($ms) { return round($ms, 2); }, $s['phases']) ?: new stdClass(),
+        'queries' => $s['queries'],
+        'rows' => $s['rows'],
+        'bytes' => $s['bytes'],
+    ]));
+}
+
+// Append one line to a log, rotating it first once it passes PERF_LOG_MAX_BYTES
+function perf_append($path, $line) {
+    if (!is_dir(dirname($path))) @mkdir(dirname($path), 0775, true);
+    if (@filesize($path) > PERF_LOG_MAX_BYTES) perf_rotate($path);
+    @file_put_contents($path, $line . "\\n", FILE_APPEND | LOCK_EX);
+}
+
+// x.log -> x.log.1 -> ... -> x.log.PERF_LOG_KEEP (the oldest is overwritten)
+function perf_rotate($path) {
+    for ($i = PERF_LOG_KEEP - 1; $i >= 1; $i--) {
+        if (file_exists("$path.$i")) @rename("$path.$i", "$path." . ($i + 1));
+    }
+    @rename($path, "$path.1");
+}
+
+// Called once per finished statement with its total SQL time; logs it (plan included)
+// when slow or sampled. Bound values are reduced to their types so no data is logged.
+function slow_query_check(PDO $pdo, $sql, array $run) {
+    if (!PERF_ENABLED || PERF_SLOW_MS === null) return;
+    $sampled = $run['ms'] < PERF_SLOW_MS;
+    if ($sampled && mt_rand() / mt_getrandmax() >= PERF_SLOW_SAMPLE) return;
+    $plan = [];
+    try {
+        // plain PDOStatement: the plan lookup is neither timed nor checked itself
+        $stmt = $pdo->prepare('EXPLAIN QUERY PLAN ' . $sql, [PDO::ATTR_STATEMENT_CLASS => ['PDOStatement']]);
+        $stmt->execute($run['params'] ?: null);
+        foreach ($stmt->fetchAll() as $r) $plan[] = $r['detail'];
+    } catch (Throwable $e) {
+        $plan[] = 'explain failed: ' . $e->getMessage();
+    }
+    $shapes = array_map(function ($v) {
+        if ($v === null || is_bool($v) || is_int($v) || is_float($v)) return gettype($v);
+        return 'string(' . strlen($v) . ')';
+    }, $run['params'] ?: []);
+    perf_append(PERF_SLOW_LOG, json_encode([
+        'ts' => date('c'),
+        'action' => perf_action_name(),
+        'ms' => round($run['ms'], 2),
+        'rows' => $run['rows'],
+        'sampled' => $sampled,
+        'sql' => preg_replace('/\\s+/', ' ', trim($sql)),
+        'params' => $shapes,
+        'plan' => $plan,
+        'full_scan' => (bool)preg_grep('/^SCAN (?!.*VIRTUAL TABLE)/', $plan),
+        'temp_btree' => (bool)preg_grep('/TEMP B-TREE/', $plan),
+    ]));
+}
+
+// PDO whose query()/exec() go through timed statements
+class AppPDO extends PDO {
+    #[\\ReturnTypeWillChange]
+    public function query($query, ...$fetchMode) {
+        $stmt = $this->prepare($query);
+        if ($fetchMode) $stmt->setFetchMode(...$fetchMode);
+        $stmt->execute();
+        return $stmt;
+    }
+
+    #[\\ReturnTypeWillChange]
+    public function exec($statement) {
+        $t = hrtime(true);
+        $rows = false;
+        try {
+            return $rows = parent::exec($statement);
+        } finally {
+            $ms = perf_ms($t);
+            perf_count('queries');
+            perf_add('sql', $ms);
+            slow_query_check($this, $statement, ['ms' => $ms, 'rows' => (int)$rows, 'params' => null]);
+        }
+    }
+}
+
+// Statement class for AppPDO (PDO::ATTR_STATEMENT_CLASS). SQLite does the work while
+// stepping, so fetches are timed as sql too, not just execute(). Each execution's total
+// goes to slow_query_check() once it is done: last row fetched, re-executed or released.
+class PerfStatement extends PDOStatement {
+    private $pdo;
+    private $run = null;
+
+    protected function __construct(PDO $pdo) {
+        $this->pdo = $pdo;
+    }
+
+    public function __destruct() {
+        $this->finish();
+    }
+
+    #[\\ReturnTypeWillChange]
+    public function execute($params = null) {
+        $this->finish();
+        $t = hrtime(true);
+        try {
+            return parent::execute($params);
+        } finally {
+            $ms = perf_ms($t);
+            perf_count('queries');
+            perf_add('sql', $ms);
+            $this->run = ['ms' => $ms, 'rows' => 0, 'params' => $params];
+        }
+    }
+
+    #[\\ReturnTypeWillChange]
+    public function fetch(...$args) {
+        $t = hrtime(true);
+        $row = parent::fetch(...$args);
+        $this->step(perf_ms($t), $row === false ? 0 : 1, $row === false);
+        return $row;
+    }
+
+    #[\\ReturnTypeWillChange]
+    public function fetchAll(...$args) {
+        $t = hrtime(true);
+        $rows = parent::fetchAll(...$args);
+        $this->step(perf_ms($t), count($rows), true);
+        return $rows;
+    }
+
+    #[\\ReturnTypeWillChange]
+    public function fetchColumn(...$args) {
+        $t = hrtime(true);
+        $value = parent::fetchColumn(...$args);
+        $this->step(perf_ms($t), $value === false ? 0 : 1, $value === false);
+        return $value;
+    }
+
+    #[\\ReturnTypeWillChange]
+    public function closeCursor() {
+        $this->finish();
+        return parent::closeCursor();
+    }
+
+    private function step($ms, $rows, $done) {
+        perf_add('sql', $ms);
+        perf_count('rows', $rows);
+        if (!$this->run) return;
+        $this->run['ms'] += $ms;
+        $this->run['rows'] += $rows;
+        if ($done) $this->finish();
+    }
+
+    private function finish() {
+        if (!$this->run) return;
+        $run = $this->run;
+        $this->run = null;
+        slow_query_check($this->pdo, $this->queryString, $run);
+    }
+}
+
+if (PERF_ENABLED && PHP_SAPI !== 'cli') register_shutdown_function('perf_log');
+?>
 """))
 
 # auth.php
-open(f"{base}/auth.php","w").write(textwrap.dedent("""
+emit("auth.php", textwrap.dedent("""\
 <?php
-session_start();
+require_once __DIR__ . '/config.php';
+require_once __DIR__ . '/perf.php';
+
+// Open the session read-only by default: the file lock is released immediately,
+// so concurrent requests from the same browser run in parallel. $_SESSION keeps what was
+// read, so the session is read once per request and only reopened to write.
+function auth_start($write = false) {
+    static $loaded = false;
+    if (session_status() === PHP_SESSION_ACTIVE || ($loaded && !$write)) return;
+    $t = hrtime(true);
+    session_start($write ? [] : ['read_and_close' => true]);
+    $loaded = true;
+    perf_add('session', perf_ms($t));
+}
+
+function token_issue($uid) {
+    $payload = rtrim(strtr(base64_encode(json_encode(['uid' => $uid, 'exp' => time() + AUTH_TOKEN_TTL])), '+/', '-_'), '=');
+    return $payload . '.' . hash_hmac('sha256', $payload, app_secret());
+}
+
+function token_claims($token) {
+    $parts = explode('.', $token ?? '', 2);
+    if (count($parts) !== 2 || !hash_equals(hash_hmac('sha256', $parts[0], app_secret()), $parts[1])) return null;
+    $claims = json_decode(base64_decode(strtr($parts[0], '-_', '+/')), true);
+    return (is_array($claims) && ($claims['exp'] ?? 0) > time()) ? $claims : null;
+}
+
+function current_user_id() {
+    if (AUTH_MODE === 'token') {
+        $claims = token_claims($_COOKIE[AUTH_COOKIE] ?? '');
+        return $claims['uid'] ?? null;
+    }
+    auth_start();
+    return $_SESSION['user_id'] ?? null;
+}
+
+function login_user($uid) {
+    if (AUTH_MODE === 'token') {
+        $token = token_issue($uid);
+        setcookie(AUTH_COOKIE, $token, ['expires' => time() + AUTH_TOKEN_TTL, 'path' => '/', 'httponly' => true, 'samesite' => 'Lax', 'secure' => !empty($_SERVER['HTTPS'])]);
+        $_COOKIE[AUTH_COOKIE] = $token;
+        return;
+    }
+    auth_start(true);
+    session_regenerate_id(true);
+    $_SESSION['user_id'] = $uid;
+    $_SESSION['csrf'] = bin2hex(random_bytes(16));
+    session_write_close();
+}
+
+function logout_user() {
+    if (AUTH_MODE === 'token') {
+        setcookie(AUTH_COOKIE, '', ['expires' => 1, 'path' => '/']);
+        return;
+    }
+    auth_start(true);
+    session_destroy();
+    $_SESSION = [];
+}
 
 function require_login() {
-    if (!isset($_SESSION['user_id'])) {
+    if (!current_user_id()) {
         http_response_code(401);
         header('Content-Type: application/json');
         echo json_encode(['error' => 'unauthorized']);
@@ -116,272 +1170,558 @@ function require_login() {
 }
 
 function csrf_token() {
+    if (AUTH_MODE === 'token') {
+        $token = $_COOKIE[AUTH_COOKIE] ?? '';
+        return $token ? hash_hmac('sha256', 'csrf|' . $token, app_secret()) : null;
+    }
+    auth_start();
     if (empty($_SESSION['csrf'])) {
+        // only time a logged-in request writes the session
+        auth_start(true);
         $_SESSION['csrf'] = bin2hex(random_bytes(16));
+        session_write_close();
     }
     return $_SESSION['csrf'];
 }
 
 function verify_csrf($token) {
+    if (AUTH_MODE === 'token') {
+        $expected = csrf_token();
+        return $expected && hash_equals($expected, $token ?? '');
+    }
+    auth_start();
     return isset($_SESSION['csrf']) && hash_equals($_SESSION['csrf'], $token ?? '');
 }
 ?>
 """))
 
 # api.php with heredoc for multi-line SQL
-api_php = """
+api_php = """\
 <?php
 require_once __DIR__ . '/db.php';
 require_once __DIR__ . '/auth.php';
 
+// actions that write; a batch containing one takes the write lock when it starts
+const WRITE_ACTIONS = [
+    'posts_create', 'posts_update', 'posts_duplicate_to_platforms', 'ideas_create', 'todos_create',
+    'todos_toggle', 'series_create', 'templates_create', 'templates_instatiate_week',
+    'rollup_rebuild', 'tags_rebuild',
+];
+
 $pdo = db();
 $input = json_input();
 $action = $_GET['action'] ?? ($input['action'] ?? '');
 
-switch ($action) {
-    case 'login':
-        $email = $input['email'] ?? '';
-        $password = $input['password'] ?? '';
-        $stmt = $pdo->prepare("SELECT id, password_hash FROM users WHERE email = ?");
-        $stmt->execute([$email]);
-        $user = $stmt->fetch();
-        if ($user && password_verify($password, $user['password_hash'])) {
-            $_SESSION['user_id'] = $user['id'];
-            respond(['ok' => true, 'csrf' => csrf_token()]);
-        } else {
-            respond(['ok' => false, 'error' => 'invalid_credentials'], 401);
-        }
-        break;
-
-    case 'logout':
-        session_destroy();
-        respond(['ok' => true]);
-        break;
-
-    case 'me':
-        if (isset($_SESSION['user_id'])) {
-            respond(['id' => $_SESSION['user_id'], 'csrf' => csrf_token()]);
-        } else {
-            respond(['id' => null]);
-        }
-        break;
-
-    case 'posts_list':
-        require_login();
-        $platform = $_GET['platform'] ?? null;
-        $status = $_GET['status'] ?? null;
-        $q = $_GET['q'] ?? null;
-        $sql = "SELECT p.*, s.name as series_name FROM posts p LEFT JOIN series s ON s.id = p.series_id WHERE 1=1";
-        $params = [];
-        if ($platform) { $sql .= " AND p.platform = ?"; $params[] = $platform; }
-        if ($status) { $sql .= " AND p.status = ?"; $params[] = $status; }
-        if ($q) { $sql .= " AND (p.title LIKE ? OR p.description LIKE ? OR p.tags LIKE ?)"; $params[]="%$q%"; $params[]="%$q%"; $params[]="%$q%"; }
-        $sql .= " ORDER BY COALESCE(p.publish_at, p.created_at) ASC";
-        $stmt = $pdo->prepare($sql);
-        $stmt->execute($params);
-        respond($stmt->fetchAll());
-        break;
-
-    case 'posts_create':
-        require_login();
-        if (!verify_csrf($input['csrf'] ?? '')) respond(['error'=>'bad_csrf'],400);
-        $post = $input['post'] ?? [];
-        $platform = $post['platform'] ?? '';
-        $desc = $post['description'] ?? '';
-        $title = $post['title'] ?? '';
-        $errors = [];
-        if (!$title) $errors[] = 'Brak tytułu';
-        $allowed = ['youtube_long','youtube_short','instagram','tiktok'];
-        if (!in_array($platform, $allowed)) $errors[] = 'Zła platforma';
-
-        $limits = ['youtube_long'=>5000, 'youtube_short'=>150, 'instagram'=>2200, 'tiktok'=>2200];
-        $maxDesc = $limits[$platform] ?? 1000;
-        if (mb_strlen($desc) > $maxDesc) $errors[] = "Opis zbyt długi (max $maxDesc)";
-        if ($errors) respond(['ok'=>false,'errors'=>$errors],400);
-
-        $stmt = $pdo->prepare("INSERT INTO posts (platform,title,description,publish_at,status,tags,series_id,created_at,updated_at) VALUES (?,?,?,?,?,?,?,datetime('now'),datetime('now'))");
-        $stmt->execute([
-            $platform,
-            $title,
-            $desc,
-            $post['publish_at'] ?? null,
-            $post['status'] ?? 'idea',
-            $post['tags'] ?? '',
-            $post['series_id'] ?? null
-        ]);
-        respond(['ok'=>true,'id'=>$pdo->lastInsertId()]);
-        break;
-
-    case 'posts_update':
-        require_login();
-        if (!verify_csrf($input['csrf'] ?? '')) respond(['error'=>'bad_csrf'],400);
-        $id = intval($input['id'] ?? 0);
-        $post = $input['post'] ?? [];
-        if (!$id) respond(['error'=>'no_id'],400);
-        $fields = ['platform','title','description','publish_at','status','tags','series_id'];
-        $set = [];
-        $params = [];
-        foreach ($fields as $f) {
-            if (array_key_exists($f, $post)) { $set[] = "$f = ?"; $params[] = $post[$f]; }
-        }
-        if (!$set) respond(['error'=>'no_changes'],400);
-        $params[] = $id;
-        $sql = "UPDATE posts SET ".implode(',', $set).", updated_at = datetime('now') WHERE id = ?";
-        $stmt = $pdo->prepare($sql);
-        $stmt->execute($params);
-        respond(['ok'=>true]);
-        break;
-
-    case 'posts_duplicate_to_platforms':
-        require_login();
-        if (!verify_csrf($input['csrf'] ?? '')) respond(['error'=>'bad_csrf'],400);
-        $id = intval($input['id'] ?? 0);
-        $platforms = $input['platforms'] ?? [];
-        $stmt = $pdo->prepare("SELECT * FROM posts WHERE id=?");
-        $stmt->execute([$id]);
-        $src = $stmt->fetch();
-        if (!$src) respond(['error'=>'not_found'],404);
-        $ids = [];
-        foreach ($platforms as $pf) {
-            $ins = $pdo->prepare("INSERT INTO posts (platform,title,description,publish_at,status,tags,series_id,created_at,updated_at) VALUES (?,?,?,?,?,?,?,datetime('now'),datetime('now'))");
-            $ins->execute([$pf,$src['title'],$src['description'],$src['publish_at'],'idea',$src['tags'],$src['series_id']]);
-            $ids[] = $pdo->lastInsertId();
+if ($action === 'batch') {
+    // Several actions in one request: one connection, one transaction, one snapshot.
+    require_login();
+    $requests = $input['requests'] ?? null;
+    if (!is_array($requests) || count($requests) > 50) respond(['error'=>'bad_batch'],400);
+    // logged as e.g. "batch:posts_update,changes_since" so call sites stay apart in the perf log
+    perf_action('batch:' . implode(',', array_map(function ($r) { return is_array($r) ? ($r['action'] ?? '') : ''; }, $requests)));
+    $results = [];
+    $writes = array_filter($requests, function ($r) { return is_array($r) && in_array($r['action'] ?? '', WRITE_ACTIONS, true); });
+    in_batch(true);
+    try {
+        if ($writes) begin_write($pdo); else $pdo->beginTransaction();
+        foreach ($requests as $key => $req) {
+            $params = (is_array($req) ? ($req['params'] ?? []) : []) + ['csrf' => $input['csrf'] ?? ''];
+            response_etag('');
+            // each item in a savepoint: a failing action is undone alone and reported as a 500
+            $pdo->exec("SAVEPOINT batch_item");
+            try {
+                handle_action($pdo, is_array($req) ? ($req['action'] ?? '') : '', $params, $params);
+                $pdo->exec("RELEASE batch_item");
+            } catch (BatchResponse $r) {
+                $pdo->exec("RELEASE batch_item");
+                $results[$key] = ['status' => $r->getCode(), 'body' => $r->data];
+                if (response_etag()) $results[$key]['etag'] = response_etag();
+            } catch (Throwable $e) {
+                $pdo->exec("ROLLBACK TO batch_item");
+                $pdo->exec("RELEASE batch_item");
+                error_log("batch item $key: " . $e->getMessage());
+                $results[$key] = ['status' => 500, 'body' => ['error' => 'server_error']];
+            }
         }
-        respond(['ok'=>true,'new_ids'=>$ids]);
-        break;
-
-    case 'ideas_list':
-        require_login();
-        $stmt = $pdo->query("SELECT * FROM ideas ORDER BY created_at DESC");
-        respond($stmt->fetchAll());
-        break;
-
-    case 'ideas_create':
-        require_login();
-        if (!verify_csrf($input['csrf'] ?? '')) respond(['error'=>'bad_csrf'],400);
-        $stmt = $pdo->prepare("INSERT INTO ideas (title, description, category, created_at) VALUES (?,?,?,datetime('now'))");
-        $stmt->execute([$input['title'] ?? '', $input['description'] ?? '', $input['category'] ?? '']);
-        respond(['ok'=>true,'id'=>$pdo->lastInsertId()]);
-        break;
-
-    case 'todos_list':
-        require_login();
-        $stmt = $pdo->query("SELECT * FROM todos ORDER BY COALESCE(due_date, created_at) ASC");
-        respond($stmt->fetchAll());
-        break;
-
-    case 'todos_create':
-        require_login();
-        if (!verify_csrf($input['csrf'] ?? '')) respond(['error'=>'bad_csrf'],400);
-        $stmt = $pdo->prepare("INSERT INTO todos (title, description, due_date, status, created_at) VALUES (?,?,?,?,datetime('now'))");
-        $stmt->execute([$input['title'] ?? '', $input['description'] ?? '', $input['due_date'] ?? null, 'open']);
-        respond(['ok'=>true,'id'=>$pdo->lastInsertId()]);
-        break;
-
-    case 'todos_toggle':
-        require_login();
-        if (!verify_csrf($input['csrf'] ?? '')) respond(['error'=>'bad_csrf'],400);
-        $id = intval($input['id'] ?? 0);
-        $stmt = $pdo->prepare("UPDATE todos SET status = CASE status WHEN 'open' THEN 'done' ELSE 'open' END WHERE id = ?");
-        $stmt->execute([$id]);
-        respond(['ok'=>true]);
-        break;
-
-    case 'series_list':
-        require_login();
-        $stmt = $pdo->query("SELECT * FROM series ORDER BY name ASC");
-        respond($stmt->fetchAll());
-        break;
-
-    case 'series_create':
-        require_login();
-        if (!verify_csrf($input['csrf'] ?? '')) respond(['error'=>'bad_csrf'],400);
-        $stmt = $pdo->prepare("INSERT INTO series (name, description) VALUES (?, ?)");
-        $stmt->execute([$input['name'] ?? '', $input['description'] ?? '']);
-        respond(['ok'=>true,'id'=>$pdo->lastInsertId()]);
-        break;
-
-    case 'templates_list':
-        require_login();
-        $stmt = $pdo->query("SELECT * FROM templates ORDER BY name ASC");
-        respond($stmt->fetchAll());
-        break;
-
-    case 'templates_create':
-        require_login();
-        if (!verify_csrf($input['csrf'] ?? '')) respond(['error'=>'bad_csrf'],400);
-        $stmt = $pdo->prepare("INSERT INTO templates (name, days_of_week, platforms) VALUES (?, ?, ?)");
-        $stmt->execute([$input['name'] ?? '', $input['days_of_week'] ?? '', $input['platforms'] ?? '']);
-        respond(['ok'=>true,'id'=>$pdo->lastInsertId()]);
-        break;
+        $pdo->commit();
+    } finally {
+        // a failed commit must not leave later respond() calls throwing BatchResponse
+        if ($pdo->inTransaction()) $pdo->rollBack();
+        in_batch(false);
+    }
+    respond(['results' => $results]);
+}
 
-    case 'templates_instatiate_week':
-        require_login();
-        if (!verify_csrf($input['csrf'] ?? '')) respond(['error'=>'bad_csrf'],400);
-        $template_id = intval($input['template_id'] ?? 0);
-        $start_date = $input['start_date'] ?? '';
-        $t = $pdo->prepare("SELECT * FROM templates WHERE id=?");
-        $t->execute([$template_id]);
-        $tpl = $t->fetch();
-        if (!$tpl) respond(['error'=>'not_found'],404);
-        $days = array_map('trim', explode(',', $tpl['days_of_week']));
-        $platforms = array_map('trim', explode(',', $tpl['platforms']));
-        $created = [];
-        foreach ($days as $d) {
-            $date = new DateTime($start_date);
+handle_action($pdo, $action, $input, $_GET);
+
+function handle_action($pdo, $action, $input, $query) {
+    switch ($action) {
+        case 'login':
+            $email = $input['email'] ?? '';
+            $password = $input['password'] ?? '';
+            $stmt = $pdo->prepare("SELECT id, password_hash FROM users WHERE email = ?");
+            $stmt->execute([$email]);
+            $user = $stmt->fetch();
+            if ($user && password_verify($password, $user['password_hash'])) {
+                login_user($user['id']);
+                respond(['ok' => true, 'csrf' => csrf_token()]);
+            } else {
+                respond(['ok' => false, 'error' => 'invalid_credentials'], 401);
+            }
+            break;
+
+        case 'logout':
+            logout_user();
+            respond(['ok' => true]);
+            break;
+
+        case 'me':
+            $uid = current_user_id();
+            if ($uid) {
+                respond(['id' => $uid, 'csrf' => csrf_token()]);
+            } else {
+                respond(['id' => null]);
+            }
+            break;
+
+        case 'posts_list':
+            require_login();
+            etag_guard($pdo, 'posts_list', ['posts', 'series', 'post_tags'], $query);
+            $platform = $query['platform'] ?? null;
+            $status = $query['status'] ?? null;
+            $q = $query['q'] ?? null;
+            $tag = $query['tag'] ?? null;
+            $limit = max(1, min(500, intval($query['limit'] ?? 100)));
+            $cursor = cursor_decode($query['cursor'] ?? '');
+            $match = $q ? fts_query($q) : '';
+            $cols = post_columns($query);
+            $params = [];
+            if ($match) {
+                // ranked full-text search; char(2)/char(3) mark hits for the client to highlight
+                $sql = "SELECT $cols,
+                               highlight(posts_fts, 0, char(2), char(3)) as title_hl,
+                               snippet(posts_fts, 1, char(2), char(3), '…', 16) as snippet
+                        FROM posts_fts
+                        JOIN posts p ON p.id = posts_fts.rowid
+                        LEFT JOIN series s ON s.id = p.series_id
+                        WHERE posts_fts MATCH ?";
+                $params[] = $match;
+            } else {
+                $sql = "SELECT $cols FROM posts p LEFT JOIN series s ON s.id = p.series_id WHERE 1=1";
+            }
+            // with a tag, its post_tags range drives the query ("+" keeps platform/status off
+            // their indexes), so the cost follows the number of tagged posts
+            $plus = $tag ? '+' : '';
+            if ($tag) { $sql .= " AND p.id IN (SELECT post_id FROM post_tags WHERE tag_id = (SELECT id FROM tags WHERE name = ?))"; $params[] = $tag; }
+            if ($platform) { $sql .= " AND {$plus}p.platform = ?"; $params[] = $platform; }
+            if ($status) { $sql .= " AND {$plus}p.status = ?"; $params[] = $status; }
+            $offset = 0;
+            if ($match) {
+                // ranked results page by offset; the match set is already narrow
+                $offset = max(0, intval($cursor['o'] ?? 0));
+                $sql .= " ORDER BY posts_fts.rank LIMIT " . ($limit + 1) . " OFFSET $offset";
+            } else {
+                // keyset pagination on (sort_at, id), served straight from the sort indexes; a NULL
+                // sort_at sorts first, so a page ending on one continues with the rest, then the dated rows
+                if (isset($cursor['k'][0])) { $sql .= " AND (p.sort_at, p.id) > (?, ?)"; $params[] = $cursor['k'][0]; $params[] = $cursor['k'][1]; }
+                elseif (isset($cursor['k'])) { $sql .= " AND (p.sort_at IS NOT NULL OR p.id > ?)"; $params[] = $cursor['k'][1]; }
+                $sql .= " ORDER BY p.sort_at ASC, p.id ASC LIMIT " . ($limit + 1);
+            }
+            $stmt = $pdo->prepare($sql);
+            $stmt->execute($params);
+            respond_stream($stmt, $limit, function ($last, $more) use ($match, $offset, $limit) {
+                if (!$more) return ['next_cursor' => null];
+                return ['next_cursor' => cursor_encode($match ? ['o' => $offset + $limit] : ['k' => [$last['sort_at'], (int)$last['id']]])];
+            });
+            break;
+
+        case 'tags_facets':
+            // tag counts among the posts matching the posts_list filters
+            require_login();
+            etag_guard($pdo, 'tags_facets', ['posts', 'post_tags'], $query);
+            $limit = max(1, min(200, intval($query['limit'] ?? 50)));
+            $match = !empty($query['q']) ? fts_query($query['q']) : '';
+            $tag = $query['tag'] ?? null;
+            $sql = "SELECT t.name, COUNT(*) as cnt FROM post_tags pt JOIN tags t ON t.id = pt.tag_id";
+            $where = [];
+            $params = [];
+            $plus = ($match || $tag) ? '+' : '';
+            if (!empty($query['platform']) || !empty($query['status'])) $sql .= " JOIN posts p ON p.id = pt.post_id";
+            if ($match) { $where[] = "pt.post_id IN (SELECT rowid FROM posts_fts WHERE posts_fts MATCH ?)"; $params[] = $match; }
+            if ($tag) { $where[] = "pt.post_id IN (SELECT post_id FROM post_tags WHERE tag_id = (SELECT id FROM tags WHERE name = ?))"; $params[] = $tag; }
+            if (!empty($query['platform'])) { $where[] = "{$plus}p.platform = ?"; $params[] = $query['platform']; }
+            if (!empty($query['status'])) { $where[] = "{$plus}p.status = ?"; $params[] = $query['status']; }
+            if ($where) $sql .= " WHERE " . implode(' AND ', $where);
+            $sql .= " GROUP BY pt.tag_id ORDER BY cnt DESC, t.name LIMIT $limit";
+            $stmt = $pdo->prepare($sql);
+            $stmt->execute($params);
+            respond($stmt->fetchAll());
+            break;
+
+        case 'posts_get':
+            require_login();
+            etag_guard($pdo, 'posts_get', ['posts', 'series'], $query);
+            $stmt = $pdo->prepare("SELECT p.*, s.name as series_name FROM posts p LEFT JOIN series s ON s.id = p.series_id WHERE p.id = ?");
+            $stmt->execute([intval($query['id'] ?? 0)]);
+            $post = $stmt->fetch();
+            if (!$post) respond(['error'=>'not_found'],404);
+            respond($post);
+            break;
+
+        case 'posts_range':
+            // calendar: posts with publish_at in [from, to], bucketed by day
+            require_login();
+            $from = $query['from'] ?? date('Y-m-01');
+            $to = $query['to'] ?? date('Y-m-t');
+            foreach ([$from, $to] as $d) {
+                if (!preg_match('/^\\d{4}-\\d{2}-\\d{2}$/', $d)) respond(['error'=>'bad_date'],400);
+            }
+            etag_guard($pdo, 'posts_range', ['posts'], ['from' => $from, 'to' => $to]);
+            $stmt = $pdo->prepare("SELECT id, title, platform, status, publish_at
+                                   FROM posts
+                                   WHERE publish_at >= ? AND publish_at < date(?, '+1 day')
+                                   ORDER BY publish_at ASC
+                                   LIMIT 5001");
+            $stmt->execute([$from, $to]);
+            // at most 5000 posts; the 5001st only tells the client the range was cut short
+            $days = [];
+            $n = 0;
+            $truncated = false;
+            while ($row = $stmt->fetch()) {
+                if (++$n > 5000) { $truncated = true; break; }
+                $days[substr($row['publish_at'], 0, 10)][] = $row;
+            }
+            $stmt->closeCursor();
+            respond(['from' => $from, 'to' => $to, 'days' => $days ?: new stdClass(), 'truncated' => $truncated]);
+            break;
+
+        case 'posts_create':
+            require_login();
+            if (!verify_csrf($input['csrf'] ?? '')) respond(['error'=>'bad_csrf'],400);
+            $post = $input['post'] ?? [];
+            $platform = $post['platform'] ?? '';
+            $desc = $post['description'] ?? '';
+            $title = $post['title'] ?? '';
+            $errors = [];
+            if (!$title) $errors[] = 'Brak tytułu';
+            $allowed = ['youtube_long','youtube_short','instagram','tiktok'];
+            if (!in_array($platform, $allowed)) $errors[] = 'Zła platforma';
+
+            $limits = ['youtube_long'=>5000, 'youtube_short'=>150, 'instagram'=>2200, 'tiktok'=>2200];
+            $maxDesc = $limits[$platform] ?? 1000;
+            if (mb_strlen($desc) > $maxDesc) $errors[] = "Opis zbyt długi (max $maxDesc)";
+            if ($errors) respond(['ok'=>false,'errors'=>$errors],400);
+
+            $id = tx($pdo, function () use ($pdo, $post, $platform, $title, $desc) {
+                $stmt = $pdo->prepare("INSERT INTO posts (platform,title,description,publish_at,status,tags,series_id,created_at,updated_at) VALUES (?,?,?,?,?,?,?,datetime('now'),datetime('now'))");
+                $stmt->execute([
+                    $platform,
+                    $title,
+                    $desc,
+                    $post['publish_at'] ?? null,
+                    $post['status'] ?? 'idea',
+                    $post['tags'] ?? '',
+                    $post['series_id'] ?? null
+                ]);
+                $id = $pdo->lastInsertId();
+                post_tags_set($pdo, $id, $post['tags'] ?? '');
+                return $id;
+            });
+            respond(['ok'=>true,'id'=>$id]);
+            break;
+
+        case 'posts_update':
+            require_login();
+            if (!verify_csrf($input['csrf'] ?? '')) respond(['error'=>'bad_csrf'],400);
+            $id = intval($input['id'] ?? 0);
+            $post = $input['post'] ?? [];
+            if (!$id) respond(['error'=>'no_id'],400);
+            $fields = ['platform','title','description','publish_at','status','tags','series_id'];
+            $set = [];
+            $params = [];
+            foreach ($fields as $f) {
+                if (array_key_exists($f, $post)) { $set[] = "$f = ?"; $params[] = $post[$f]; }
+            }
+            if (!$set) respond(['error'=>'no_changes'],400);
+            $params[] = $id;
+            $sql = "UPDATE posts SET ".implode(',', $set).", updated_at = datetime('now') WHERE id = ?";
+            tx($pdo, function () use ($pdo, $sql, $params, $post, $id) {
+                $stmt = $pdo->prepare($sql);
+                $stmt->execute($params);
+                if (array_key_exists('tags', $post)) post_tags_set($pdo, $id, $post['tags']);
+            });
+            respond(['ok'=>true]);
+            break;
+
+        case 'posts_duplicate_to_platforms':
+            require_login();
+            if (!verify_csrf($input['csrf'] ?? '')) respond(['error'=>'bad_csrf'],400);
+            $id = intval($input['id'] ?? 0);
+            $platforms = $input['platforms'] ?? [];
+            $stmt = $pdo->prepare("SELECT * FROM posts WHERE id=?");
+            $stmt->execute([$id]);
+            $src = $stmt->fetch();
+            if (!$src) respond(['error'=>'not_found'],404);
+            $rows = [];
+            foreach ($platforms as $pf) {
+                $rows[] = [$pf,$src['title'],$src['description'],$src['publish_at'],'idea',$src['tags'],$src['series_id']];
+            }
+            $ids = tx($pdo, function () use ($pdo, $rows, $id) {
+                $ids = bulk_insert($pdo, "INSERT INTO posts (platform,title,description,publish_at,status,tags,series_id,created_at,updated_at) VALUES (?,?,?,?,?,?,?,datetime('now'),datetime('now'))", $rows);
+                // copies carry the source's tags
+                $copy = $pdo->prepare("INSERT INTO post_tags (tag_id, post_id) SELECT tag_id, ? FROM post_tags WHERE post_id = ?");
+                foreach ($ids as $newId) $copy->execute([$newId, $id]);
+                return $ids;
+            });
+            respond(['ok'=>true,'new_ids'=>$ids]);
+            break;
+
+        case 'ideas_list':
+            require_login();
+            etag_guard($pdo, 'ideas_list', ['ideas'], $query);
+            respond_stream($pdo->query("SELECT * FROM ideas ORDER BY created_at DESC"));
+            break;
+
+        case 'ideas_create':
+            require_login();
+            if (!verify_csrf($input['csrf'] ?? '')) respond(['error'=>'bad_csrf'],400);
+            $stmt = $pdo->prepare("INSERT INTO ideas (title, description, category, created_at, updated_at) VALUES (?,?,?,datetime('now'),datetime('now'))");
+            $stmt->execute([$input['title'] ?? '', $input['description'] ?? '', $input['category'] ?? '']);
+            respond(['ok'=>true,'id'=>$pdo->lastInsertId()]);
+            break;
+
+        case 'todos_list':
+            require_login();
+            etag_guard($pdo, 'todos_list', ['todos'], $query);
+            respond_stream($pdo->query("SELECT * FROM todos ORDER BY COALESCE(due_date, created_at) ASC"));
+            break;
+
+        case 'todos_create':
+            require_login();
+            if (!verify_csrf($input['csrf'] ?? '')) respond(['error'=>'bad_csrf'],400);
+            $stmt = $pdo->prepare("INSERT INTO todos (title, description, due_date, status, created_at, updated_at) VALUES (?,?,?,?,datetime('now'),datetime('now'))");
+            $stmt->execute([$input['title'] ?? '', $input['description'] ?? '', $input['due_date'] ?? null, 'open']);
+            respond(['ok'=>true,'id'=>$pdo->lastInsertId()]);
+            break;
+
+        case 'todos_toggle':
+            require_login();
+            if (!verify_csrf($input['csrf'] ?? '')) respond(['error'=>'bad_csrf'],400);
+            $id = intval($input['id'] ?? 0);
+            $stmt = $pdo->prepare("UPDATE todos SET status = CASE status WHEN 'open' THEN 'done' ELSE 'open' END, updated_at = datetime('now') WHERE id = ?");
+            $stmt->execute([$id]);
+            respond(['ok'=>true]);
+            break;
+
+        case 'series_list':
+            require_login();
+            etag_guard($pdo, 'series_list', ['series'], $query);
+            $stmt = $pdo->query("SELECT * FROM series ORDER BY name ASC");
+            respond($stmt->fetchAll());
+            break;
+
+        case 'series_create':
+            require_login();
+            if (!verify_csrf($input['csrf'] ?? '')) respond(['error'=>'bad_csrf'],400);
+            $stmt = $pdo->prepare("INSERT INTO series (name, description, updated_at) VALUES (?, ?, datetime('now'))");
+            $stmt->execute([$input['name'] ?? '', $input['description'] ?? '']);
+            respond(['ok'=>true,'id'=>$pdo->lastInsertId()]);
+            break;
+
+        case 'templates_list':
+            require_login();
+            etag_guard($pdo, 'templates_list', ['templates'], $query);
+            $stmt = $pdo->query("SELECT * FROM templates ORDER BY name ASC");
+            respond($stmt->fetchAll());
+            break;
+
+        case 'templates_create':
+            require_login();
+            if (!verify_csrf($input['csrf'] ?? '')) respond(['error'=>'bad_csrf'],400);
+            $stmt = $pdo->prepare("INSERT INTO templates (name, days_of_week, platforms, updated_at) VALUES (?, ?, ?, datetime('now'))");
+            $stmt->execute([$input['name'] ?? '', $input['days_of_week'] ?? '', $input['platforms'] ?? '']);
+            respond(['ok'=>true,'id'=>$pdo->lastInsertId()]);
+            break;
+
+        case 'templates_instatiate_week':
+            require_login();
+            if (!verify_csrf($input['csrf'] ?? '')) respond(['error'=>'bad_csrf'],400);
+            $template_id = intval($input['template_id'] ?? 0);
+            $start_date = $input['start_date'] ?? '';
+            $weeks = max(1, min(52, intval($input['weeks'] ?? 1)));
+            $t = $pdo->prepare("SELECT * FROM templates WHERE id=?");
+            $t->execute([$template_id]);
+            $tpl = $t->fetch();
+            if (!$tpl) respond(['error'=>'not_found'],404);
+            $days = array_map('trim', explode(',', $tpl['days_of_week']));
+            $platforms = array_map('trim', explode(',', $tpl['platforms']));
             $map = ['Mon'=>1,'Tue'=>2,'Wed'=>3,'Thu'=>4,'Fri'=>5,'Sat'=>6,'Sun'=>7];
-            $dow = $map[$d] ?? null;
-            if ($dow) {
-                $isoDow = (int)$date->format('N');
-                $offset = $dow - $isoDow;
-                $date->modify(($offset>=0?"+$offset":"$offset") . " day");
-                foreach ($platforms as $pf) {
-                    $ins = $pdo->prepare("INSERT INTO posts (platform,title,description,publish_at,status,tags,series_id,created_at,updated_at) VALUES (?,?,?,?,?,?,?,datetime('now'),datetime('now'))");
-                    $ins->execute([$pf,"[TPL] ".$tpl['name'],"", $date->format('Y-m-d 10:00:00'), 'scheduled', '', null]);
-                    $created[] = $pdo->lastInsertId();
+            $rows = [];
+            for ($w = 0; $w < $weeks; $w++) {
+                foreach ($days as $d) {
+                    $dow = $map[$d] ?? null;
+                    if (!$dow) continue;
+                    $date = new DateTime($start_date);
+                    $offset = $dow - (int)$date->format('N') + 7 * $w;
+                    $date->modify(($offset>=0?"+$offset":"$offset") . " day");
+                    foreach ($platforms as $pf) {
+                        $rows[] = [$pf,"[TPL] ".$tpl['name'],"", $date->format('Y-m-d 10:00:00'), 'scheduled', '', null];
+                    }
                 }
             }
-        }
-        respond(['ok'=>true,'created'=>$created]);
-        break;
-
-    case 'report_weekly':
-        require_login();
-        $start = $_GET['start'] ?? (new DateTime('monday this week'))->format('Y-m-d');
-        $end = (new DateTime($start))->modify('+6 days')->format('Y-m-d');
-        $sql = "SELECT platform, status, COUNT(*) as cnt
-                FROM posts
-                WHERE date(publish_at) BETWEEN date(?) AND date(?)
-                GROUP BY platform, status";
-        $stmt = $pdo->prepare($sql);
-        $stmt->execute([$start, $end]);
-        respond(['start'=>$start,'end'=>$end,'rows'=>$stmt->fetchAll()]);
-        break;
-
-    case 'report_series_effectiveness':
-        require_login();
-        $sql = "SELECT s.name as series, p.status, COUNT(*) as cnt
-                FROM posts p
-                LEFT JOIN series s ON s.id = p.series_id
-                GROUP BY s.name, p.status
-                ORDER BY s.name";
-        $stmt = $pdo->query($sql);
-        respond($stmt->fetchAll());
-        break;
+            // one prepared statement and one commit for the whole range
+            $created = bulk_insert($pdo, "INSERT INTO posts (platform,title,description,publish_at,status,tags,series_id,created_at,updated_at) VALUES (?,?,?,?,?,?,?,datetime('now'),datetime('now'))", $rows);
+            respond(['ok'=>true,'created'=>$created]);
+            break;
+
+        case 'changes_since':
+            require_login();
+            respond(tx($pdo, function () use ($pdo, $query) {
+                $rev = (int)$pdo->query("SELECT COALESCE(MAX(rev), 0) FROM changes")->fetchColumn();
+                if (!isset($query['since'])) {
+                    // no token yet: just hand out the current revision
+                    return ['rev' => $rev, 'changes' => new stdClass()];
+                }
+                $since = intval($query['since']);
+                $stmt = $pdo->prepare("SELECT COUNT(*) FROM changes WHERE rev > ?");
+                $stmt->execute([$since]);
+                if ($stmt->fetchColumn() > 2000) {
+                    // too far behind, a full reload is cheaper
+                    return ['rev' => $rev, 'reset' => true];
+                }
+                $changes = [];
+                foreach (SYNC_TABLES as $tbl) {
+                    $select = $tbl === 'posts'
+                        ? "SELECT " . post_columns($query) . " FROM changes c JOIN posts p ON p.id = c.row_id LEFT JOIN series s ON s.id = p.series_id"
+                        : "SELECT t.* FROM changes c JOIN $tbl t ON t.id = c.row_id";
+                    $stmt = $pdo->prepare("$select WHERE c.tbl = ? AND c.rev > ? AND c.deleted = 0");
+                    $stmt->execute([$tbl, $since]);
+                    $upserts = $stmt->fetchAll();
+                    $stmt = $pdo->prepare("SELECT row_id FROM changes WHERE tbl = ? AND rev > ? AND deleted = 1");
+                    $stmt->execute([$tbl, $since]);
+                    $deletes = $stmt->fetchAll(PDO::FETCH_COLUMN);
+                    if ($upserts || $deletes) $changes[$tbl] = ['upserts' => $upserts, 'deletes' => $deletes];
+                }
+                return ['rev' => $rev, 'changes' => $changes ?: new stdClass()];
+            }));
+            break;
+
+        case 'dashboard_summary':
+            require_login();
+            $today = date('Y-m-d');
+            etag_guard($pdo, 'dashboard_summary', ['posts', 'todos', 'posts_daily_rollup'], ['today' => $today]);
+            $start = (new DateTime('monday this week'))->format('Y-m-d');
+            $end = (new DateTime($start))->modify('+6 days')->format('Y-m-d');
+            respond(tx($pdo, function () use ($pdo, $today, $start, $end) {
+                $stmt = $pdo->prepare("SELECT id, title, platform, status, publish_at FROM posts
+                                       WHERE publish_at >= ? ORDER BY publish_at LIMIT 5");
+                $stmt->execute([$today]);
+                $upcoming = $stmt->fetchAll();
+                $todos = $pdo->query("SELECT id, title, due_date, status FROM todos
+                                      WHERE status = 'open' ORDER BY COALESCE(due_date, created_at) LIMIT 5")->fetchAll();
+                $open = (int)$pdo->query("SELECT COUNT(*) FROM todos WHERE status = 'open'")->fetchColumn();
+                // counts come from the rollup (one row per day/platform/status/series), not from posts
+                $status = $pdo->query("SELECT status, SUM(cnt) FROM posts_daily_rollup GROUP BY status")
+                              ->fetchAll(PDO::FETCH_KEY_PAIR);
+                $stmt = $pdo->prepare("SELECT platform, SUM(cnt) FROM posts_daily_rollup
+                                       WHERE day BETWEEN ? AND ? GROUP BY platform");
+                $stmt->execute([$start, $end]);
+                $week = array_map('intval', $stmt->fetchAll(PDO::FETCH_KEY_PAIR));
+                return [
+                    'upcoming' => $upcoming,
+                    'todos' => $todos,
+                    'todos_open' => $open,
+                    'status_counts' => array_map('intval', $status) ?: new stdClass(),
+                    'week' => ['start' => $start, 'end' => $end, 'total' => array_sum($week),
+                               'by_platform' => $week ?: new stdClass()],
+                ];
+            }));
+            break;
+
+        case 'report_weekly':
+            require_login();
+            $start = $query['start'] ?? (new DateTime('monday this week'))->format('Y-m-d');
+            $end = (new DateTime($start))->modify('+6 days')->format('Y-m-d');
+            etag_guard($pdo, 'report_weekly', ['posts', 'posts_daily_rollup'], ['start' => $start]);
+            $sql = "SELECT platform, status, SUM(cnt) as cnt
+                    FROM posts_daily_rollup
+                    WHERE day BETWEEN date(?) AND date(?)
+                    GROUP BY platform, status";
+            $stmt = $pdo->prepare($sql);
+            $stmt->execute([$start, $end]);
+            respond(['start'=>$start,'end'=>$end,'rows'=>$stmt->fetchAll()]);
+            break;
+
+        case 'report_series_effectiveness':
+            require_login();
+            etag_guard($pdo, 'report_series_effectiveness', ['posts', 'series', 'posts_daily_rollup'], $query);
+            // optional from/to narrows the scan to a day range of the rollup
+            $where = "WHERE 1=1";
+            $params = [];
+            if (!empty($query['from'])) { $where .= " AND r.day >= date(?)"; $params[] = $query['from']; }
+            if (!empty($query['to'])) { $where .= " AND r.day <> '' AND r.day <= date(?)"; $params[] = $query['to']; }
+            $sql = "SELECT s.name as series, x.status, x.cnt
+                    FROM (SELECT r.series_id, r.status, SUM(r.cnt) as cnt
+                          FROM posts_daily_rollup r
+                          $where
+                          GROUP BY r.series_id, r.status) x
+                    LEFT JOIN series s ON s.id = NULLIF(x.series_id, 0)
+                    ORDER BY s.name";
+            $stmt = $pdo->prepare($sql);
+            $stmt->execute($params);
+            respond($stmt->fetchAll());
+            break;
+
+        case 'rollup_rebuild':
+            require_login();
+            if (!verify_csrf($input['csrf'] ?? '')) respond(['error'=>'bad_csrf'],400);
+            rollup_rebuild($pdo);
+            respond(['ok'=>true]);
+            break;
+
+        case 'tags_rebuild':
+            require_login();
+            if (!verify_csrf($input['csrf'] ?? '')) respond(['error'=>'bad_csrf'],400);
+            post_tags_rebuild($pdo);
+            respond(['ok'=>true]);
+            break;
+
+        default:
+            respond(['error' => 'unknown_action', 'action' => $action], 404);
+    }
+}
 
-    default:
-        respond(['error' => 'unknown_action', 'action' => $action], 404);
+// Select list for posts: ?view= names a projection, ?fields= picks columns; default is
+// the full row. id and sort_at are always included (row key and pagination cursor).
+function post_columns(array $query) {
+    $views = [
+        'kanban' => ['title', 'platform', 'status'],
+        'calendar' => ['title', 'platform', 'status', 'publish_at'],
+        'table' => ['title', 'platform', 'status', 'publish_at', 'tags', 'series_id'],
+    ];
+    $all = ['platform', 'title', 'description', 'publish_at', 'status', 'tags', 'series_id', 'created_at', 'updated_at', 'series_name'];
+    if (!empty($query['fields'])) {
+        $cols = array_intersect($all, array_map('trim', explode(',', $query['fields'])));
+    } elseif (isset($views[$query['view'] ?? ''])) {
+        $cols = $views[$query['view']];
+    } else {
+        return 'p.*, s.name as series_name';
+    }
+    $sql = ['p.id', 'p.sort_at'];
+    foreach ($cols as $c) $sql[] = $c === 'series_name' ? 's.name as series_name' : "p.$c";
+    return implode(', ', $sql);
 }
 ?>
 """
-open(f"{base}/api.php","w").write(api_php)
+emit("api.php", api_php)
 
 # export_csv.php
-open(f"{base}/export_csv.php","w").write(textwrap.dedent("""
+emit("export_csv.php", textwrap.dedent("""\
 <?php
 require_once __DIR__ . '/db.php';
 require_once __DIR__ . '/auth.php';
 require_login();
+etag_guard(db(), 'export_csv', ['posts'], $_GET);
 
 header('Content-Type: text/csv; charset=utf-8');
 header('Content-Disposition: attachment; filename="posts_export.csv"');
@@ -397,49 +1737,151 @@ fclose($out);
 """))
 
 # export_ics.php
-open(f"{base}/export_ics.php","w").write(textwrap.dedent("""
+emit("export_ics.php", textwrap.dedent("""\
 <?php
 require_once __DIR__ . '/db.php';
 require_once __DIR__ . '/auth.php';
 require_login();
 
+// Optional window for subscriptions, e.g. ?days=90 (ahead of today) and ?past=7 (days back)
+$days = isset($_GET['days']) ? max(1, min(3660, intval($_GET['days']))) : null;
+$past = max(0, min(3660, intval($_GET['past'] ?? 0)));
+$windowed = $days !== null || $past > 0;
+$today = gmdate('Y-m-d');
+
+$pdo = db();
+etag_guard($pdo, 'export_ics', ['posts'], ['days' => $days, 'past' => $past, 'today' => $windowed ? $today : null]);
+
+// Last-Modified: time of the newest posts entry in the changes log (deletes included)
+$changed = $pdo->query("SELECT changed_at FROM changes WHERE tbl = 'posts' ORDER BY rev DESC LIMIT 1")->fetchColumn();
+$lastMod = max(strtotime(($changed ?: '1970-01-01 00:00:00') . ' UTC'), $windowed ? strtotime($today . ' UTC') : 0);
+header('Last-Modified: ' . gmdate('D, d M Y H:i:s', $lastMod) . ' GMT');
+if (!isset($_SERVER['HTTP_IF_NONE_MATCH']) && isset($_SERVER['HTTP_IF_MODIFIED_SINCE'])
+    && strtotime($_SERVER['HTTP_IF_MODIFIED_SINCE']) >= $lastMod) {
+    http_response_code(304);
+    exit;
+}
+
+// +p.status keeps the planner on the publish_at index, which already yields rows in output order
+$sql = "SELECT p.id, p.title, p.publish_at, p.platform,
+               (SELECT c.rev FROM changes c WHERE c.tbl = 'posts' AND c.row_id = p.id) as rev
+        FROM posts p
+        WHERE p.publish_at IS NOT NULL AND +p.status IN ('scheduled','published')";
+$params = [];
+if ($windowed) { $sql .= " AND p.publish_at >= date(?, ?)"; $params[] = $today; $params[] = "-$past days"; }
+if ($days !== null) { $sql .= " AND p.publish_at < date(?, ?)"; $params[] = $today; $params[] = "+$days days"; }
+$sql .= " ORDER BY p.publish_at ASC";
+$stmt = $pdo->prepare($sql);
+$stmt->execute($params);
+
 header('Content-Type: text/calendar; charset=utf-8');
 header('Content-Disposition: attachment; filename="posts_calendar.ics"');
 
-$rows = db()->query("SELECT id, title, publish_at, platform FROM posts WHERE publish_at IS NOT NULL AND status IN ('scheduled','published') ORDER BY publish_at ASC")->fetchAll();
-
-echo "BEGIN:VCALENDAR\r\nVERSION:2.0\r\nPRODID:-//SoloCreator//Planner//EN\r\n";
-foreach ($rows as $r) {
-    $dt = (new DateTime($r['publish_at']))->format('Ymd\\THis\\Z');
-    $uid = $r['id'] . "@solocreator";
-    $title = addcslashes($r['title'], ",;\\n");
-    $desc = strtoupper($r['platform']);
-    echo "BEGIN:VEVENT\\r\\nUID:$uid\\r\\nDTSTAMP:$dt\\r\\nDTSTART:$dt\\r\\nSUMMARY:$title\\r\\nDESCRIPTION:$desc\\r\\nEND:VEVENT\\r\\n";
+// Rows are streamed from the cursor; rendered VEVENTs are cached in APCu (when available)
+// under post id + row revision, so an edit invalidates exactly one fragment.
+$cache = function_exists('apcu_fetch') && apcu_enabled();
+echo "BEGIN:VCALENDAR\\r\\nVERSION:2.0\\r\\nPRODID:-//SoloCreator//Planner//EN\\r\\n";
+$n = 0;
+while ($r = $stmt->fetch()) {
+    $key = 'ics:' . $r['id'] . ':' . $r['rev'];
+    $event = $cache ? apcu_fetch($key) : false;
+    if ($event === false) {
+        $d = preg_replace('/\\D/', '', $r['publish_at']);
+        $dt = substr($d, 0, 8) . 'T' . str_pad(substr($d, 8, 6), 6, '0') . 'Z';
+        $uid = $r['id'] . "@solocreator";
+        $title = addcslashes($r['title'], ",;\\n");
+        $desc = strtoupper($r['platform']);
+        $event = "BEGIN:VEVENT\\r\\nUID:$uid\\r\\nDTSTAMP:$dt\\r\\nDTSTART:$dt\\r\\nSUMMARY:$title\\r\\nDESCRIPTION:$desc\\r\\nEND:VEVENT\\r\\n";
+        if ($cache) apcu_store($key, $event, 86400);
+    }
+    echo $event;
+    if (++$n % 500 === 0) flush();
 }
 echo "END:VCALENDAR\\r\\n";
 ?>
 """))
 
 # backup.php
-open(f"{base}/backup.php","w").write(textwrap.dedent("""
+emit("backup.php", textwrap.dedent("""\
 <?php
+require_once __DIR__ . '/db.php';
 require_once __DIR__ . '/auth.php';
 require_login();
 
-$path = __DIR__ . '/data.sqlite';
-if (!file_exists($path)) {
-    http_response_code(404);
-    echo "Database not found";
-    exit;
+// Gzip on the fly and push each compressed piece straight to the client
+function gz_out($ctx, $data, $mode = ZLIB_NO_FLUSH) {
+    $chunk = deflate_add($ctx, $data, $mode);
+    if ($chunk !== '') {
+        echo $chunk;
+        flush();
+    }
+}
+
+$pdo = db();
+$stamp = date('Ymd_His');
+$gz = deflate_init(ZLIB_ENCODING_GZIP, ['level' => 6]);
+
+if (isset($_GET['since'])) {
+    // Incremental: only rows written after an earlier backup's revision, as gzipped JSON lines
+    $since = intval($_GET['since']);
+    $pdo->beginTransaction();
+    $rev = (int)$pdo->query("SELECT COALESCE(MAX(rev), 0) FROM changes")->fetchColumn();
+    header('Content-Type: application/gzip');
+    header('Content-Disposition: attachment; filename="backup_' . $stamp . '_rev' . $since . '-' . $rev . '.jsonl.gz"');
+    header('X-Backup-Rev: ' . $rev);
+    gz_out($gz, json_encode(['since' => $since, 'rev' => $rev]) . "\\n");
+    foreach (SYNC_TABLES as $tbl) {
+        $stmt = $pdo->prepare("SELECT t.* FROM changes c JOIN $tbl t ON t.id = c.row_id WHERE c.tbl = ? AND c.rev > ? AND c.deleted = 0");
+        $stmt->execute([$tbl, $since]);
+        while ($row = $stmt->fetch()) {
+            gz_out($gz, json_encode(['tbl' => $tbl, 'op' => 'upsert', 'row' => $row]) . "\\n");
+        }
+        $stmt = $pdo->prepare("SELECT row_id FROM changes WHERE tbl = ? AND rev > ? AND deleted = 1");
+        $stmt->execute([$tbl, $since]);
+        while (($id = $stmt->fetchColumn()) !== false) {
+            gz_out($gz, json_encode(['tbl' => $tbl, 'op' => 'delete', 'id' => (int)$id]) . "\\n");
+        }
+    }
+    $pdo->commit();
+} else {
+    // Full: VACUUM INTO copies from one read snapshot, so the file is never torn mid-write
+    $tmp = sys_get_temp_dir() . '/sc_backup_' . bin2hex(random_bytes(8)) . '.sqlite';
+    try {
+        $pdo->exec('VACUUM INTO ' . $pdo->quote($tmp));
+        $snap = new PDO('sqlite:' . $tmp);
+        $check = $snap->query('PRAGMA quick_check')->fetchColumn();
+        $rev = (int)$snap->query("SELECT COALESCE(MAX(rev), 0) FROM changes")->fetchColumn();
+    } catch (Throwable $e) {
+        error_log('backup: ' . $e->getMessage());
+        $check = 'snapshot failed';
+    }
+    $snap = null;
+    // nothing has been sent yet: a failed snapshot is a plain error, not a truncated .gz
+    if ($check !== 'ok') {
+        @unlink($tmp);
+        http_response_code(500);
+        header('Content-Type: text/plain; charset=utf-8');
+        exit("Backup failed: $check");
+    }
+    header('Content-Type: application/gzip');
+    header('Content-Disposition: attachment; filename="backup_' . $stamp . '_rev' . $rev . '.sqlite.gz"');
+    header('X-Backup-Rev: ' . $rev);
+    try {
+        $in = fopen($tmp, 'rb');
+        while (!feof($in)) {
+            gz_out($gz, fread($in, 65536));
+        }
+        fclose($in);
+    } finally {
+        @unlink($tmp);
+    }
 }
-header('Content-Type: application/octet-stream');
-header('Content-Disposition: attachment; filename=\"backup_' . date('Ymd_His') . '.sqlite\"');
-readfile($path);
+gz_out($gz, '', ZLIB_FINISH);
 ?>
 """))
 
 # index.php
-open(f"{base}/index.php","w").write(textwrap.dedent("""
+emit("index.php", textwrap.dedent("""\
 <?php require_once __DIR__ . '/auth.php'; ?>
 <!doctype html>
 <html lang="pl" data-theme="light">
@@ -481,7 +1923,7 @@ open(f"{base}/index.php","w").write(textwrap.dedent("""
 """))
 
 # style.css
-open(f"{base}/assets/style.css","w").write(textwrap.dedent("""
+emit("assets/style.css", textwrap.dedent("""
 :root {
   --bg: #ffffff;
   --text: #111111;
@@ -531,6 +1973,13 @@ button.primary { background: var(--accent); color: white; border-color: transpar
 .column { background: var(--card); border: 1px solid var(--border); border-radius: 10px; padding: .5rem; min-height: 200px; }
 .column h4 { margin-top: 0; }
 .card-item { background: var(--bg); border: 1px solid var(--border); border-radius: 10px; padding: .5rem; margin-bottom: .5rem; }
+/* windowed lists: fixed-height rows inside a scrolling viewport */
+.vlist { max-height: 70vh; overflow-y: auto; }
+.vlist table { table-layout: fixed; }
+.vlist thead th { position: sticky; top: 0; background: var(--card); z-index: 1; }
+.vlist tbody tr:not(.vspace) td { height: 2.6rem; white-space: nowrap; overflow: hidden; text-overflow: ellipsis; }
+.vlist .vspace td { padding: 0; border: 0; }
+.column.vlist .card-item { height: 6.5rem; overflow: hidden; box-sizing: border-box; }
 .calendar { display: grid; grid-template-columns: repeat(7, 1fr); gap: 2px; border: 1px solid var(--border); }
 .calendar .day { padding: .5rem; min-height: 80px; border-right: 1px solid var(--border); border-bottom: 1px solid var(--border); }
 .calendar .day header { font-size: .9rem; color: var(--muted); }
@@ -542,7 +1991,7 @@ button.primary { background: var(--accent); color: white; border-color: transpar
 """))
 
 # app.js
-open(f"{base}/assets/app.js","w").write(textwrap.dedent("""
+emit("assets/app.js", textwrap.dedent("""
 // SPA-like front-end with fetch() to PHP API
 const $ = (sel, el=document) => el.querySelector(sel);
 const $$ = (sel, el=document) => [...el.querySelectorAll(sel)];
@@ -551,7 +2000,12 @@ const state = {
   me: null,
   csrf: null,
   posts: [], ideas: [], todos: [], templates: [], series: [],
-  filters: { platform:'', status:'', q:'' },
+  postsCursor: null, postsLoading: false,
+  rev: null,
+  calMonth: null,
+  dashboard: null,
+  loaded: false,
+  filters: { platform:'', status:'', q:'', tag:'' },
   view: 'dashboard'
 };
 
@@ -559,6 +2013,8 @@ function setTheme(theme) {
   document.documentElement.setAttribute('data-theme', theme);
   localStorage.setItem('theme', theme);
 }
+state.calMonth = startOfMonth(new Date());
+
 (function initTheme(){
   setTheme(localStorage.getItem('theme') || 'light');
 })();
@@ -590,13 +2046,25 @@ function statusLabel(s) {
   return {idea:'Pomysł', in_production:'W produkcji', ready:'Gotowy', scheduled:'Zaplanowany', published:'Opublikowany'}[s] || s;
 }
 
-function navTo(view) { state.view = view; render(); }
+// Views backed by the full collections; dashboard, calendar and reports fetch their own data.
+const COLLECTION_VIEWS = ['kanban', 'posts', 'ideas', 'todo', 'templates'];
+
+async function ensureData(view) {
+  if (!state.me) return;
+  if (view === 'dashboard' && !state.dashboard) await loadDashboard();
+  if (COLLECTION_VIEWS.includes(view) && !state.loaded) {
+    $('#app').innerHTML = '<p>Ładowanie…</p>';
+    await loadAll();
+  }
+}
+
+async function navTo(view) { state.view = view; await ensureData(view); render(); }
 
 function shortcutSetup() {
   document.addEventListener('keydown', (e)=>{
     if (e.target.matches('input,textarea,select')) return;
-    if (e.key === 'n') { e.preventDefault(); navTo('posts'); setTimeout(()=>$('#newPostBtn')?.click(), 0); }
-    if (e.key === 'f') { e.preventDefault(); navTo('posts'); setTimeout(()=>$('#filterQ')?.focus(), 0); }
+    if (e.key === 'n') { e.preventDefault(); navTo('posts').then(()=>$('#newPostBtn')?.click()); }
+    if (e.key === 'f') { e.preventDefault(); navTo('posts').then(()=>$('#filterQ')?.focus()); }
     if (e.key === '?') { e.preventDefault(); toast('Skróty: n = nowy post, f = filtruj, g d = dashboard, g k = kalendarz, g p = posty'); }
     if (e.key === 'g') {
       document.addEventListener('keydown', function once(ev){
@@ -609,26 +2077,143 @@ function shortcutSetup() {
   });
 }
 
+const PAGE_SIZE = 100;
+// list rows carry only what the list/kanban/calendar/dashboard render; the editor loads the full post
+const POST_VIEW = 'table';
+
+// Last ETag + body per read request; the server answers 304 when nothing it reads has changed.
+const etagCache = new Map();
+
+// Several actions in one request and one DB snapshot; results come back under the same keys.
+async function batch(requests) {
+  const sigs = {}, sent = {};
+  for (const [key, req] of Object.entries(requests)) {
+    sigs[key] = JSON.stringify([req.action, req.params || {}]);
+    const hit = etagCache.get(sigs[key]);
+    sent[key] = hit ? { ...req, params: { ...req.params, if_none_match: hit.etag } } : req;
+  }
+  const { results } = await api('batch', { requests: sent, csrf: state.csrf });
+  const out = {};
+  for (const [key, r] of Object.entries(results)) {
+    if (r.status === 304) { out[key] = etagCache.get(sigs[key]).body; continue; }
+    if (r.status >= 400) throw new Error(JSON.stringify(r.body));
+    if (r.etag) etagCache.set(sigs[key], { etag: r.etag, body: r.body });
+    out[key] = r.body;
+  }
+  return out;
+}
+
 async function loadAll() {
   if (!state.me) return;
-  const [posts, ideas, todos, templates, series] = await Promise.all([
-    api('posts_list', {}, 'GET', state.filters),
-    api('ideas_list', {}, 'GET'),
-    api('todos_list', {}, 'GET'),
-    api('templates_list', {}, 'GET'),
-    api('series_list', {}, 'GET')
-  ]);
-  Object.assign(state, {posts, ideas, todos, templates, series});
+  const { sync, page, ideas, todos, templates, series } = await batch({
+    sync: { action: 'changes_since' },
+    page: { action: 'posts_list', params: { ...state.filters, view: POST_VIEW, limit: PAGE_SIZE } },
+    ideas: { action: 'ideas_list' },
+    todos: { action: 'todos_list' },
+    templates: { action: 'templates_list' },
+    series: { action: 'series_list' }
+  });
+  monthCache.clear();
+  Object.assign(state, {rev: sync.rev, posts: page.rows, postsCursor: page.next_cursor, ideas, todos, templates, series, loaded: true});
+}
+
+// Landing view: one small summary instead of the collections. Takes the sync rev too so
+// writes made from the dashboard can go through mutate() right away.
+async function loadDashboard() {
+  const { sync, dash } = await batch({
+    sync: { action: 'changes_since' },
+    dash: { action: 'dashboard_summary' }
+  });
+  if (state.rev === null) state.rev = sync.rev;
+  state.dashboard = dash;
+}
+
+async function loadMorePosts() {
+  if (!state.postsCursor || state.postsLoading) return;
+  state.postsLoading = true;
+  try {
+    const page = await api('posts_list', {}, 'GET', { ...state.filters, view: POST_VIEW, limit: PAGE_SIZE, cursor: state.postsCursor });
+    state.posts = state.posts.concat(page.rows);
+    state.postsCursor = page.next_cursor;
+  } finally {
+    state.postsLoading = false;
+  }
+  if (state.view === 'posts' || state.view === 'kanban') render();
+}
+
+// Run a write and pull the deltas it caused (changes since state.rev) in the same round trip.
+async function mutate(action, payload) {
+  if (state.rev === null) { await api(action, payload); return loadAll(); }
+  const requests = {
+    write: { action, params: payload },
+    sync: { action: 'changes_since', params: { since: state.rev, view: POST_VIEW } }
+  };
+  if (state.dashboard) requests.dash = { action: 'dashboard_summary' };
+  const res = await batch(requests);
+  if (res.dash) state.dashboard = res.dash;
+  await applySync(res.sync);
+  return res.write;
+}
+
+async function applySync(d) {
+  if (d.reset) return loadAll();
+  // collections not fetched yet are loaded whole on first use, so nothing to merge into
+  if (state.loaded) for (const [tbl, c] of Object.entries(d.changes)) mergeRows(tbl, c.upserts, c.deletes);
+  if (d.changes.posts) monthCache.clear();
+  state.rev = d.rev;
+}
+
+const rowOrder = {
+  posts: (a,b) => cmp(a.sort_at, b.sort_at) || a.id - b.id,
+  ideas: (a,b) => cmp(b.created_at, a.created_at),
+  todos: (a,b) => cmp(a.due_date || a.created_at, b.due_date || b.created_at),
+  templates: (a,b) => cmp(a.name, b.name),
+  series: (a,b) => cmp(a.name, b.name)
+};
+
+function mergeRows(tbl, upserts, deletes) {
+  const gone = new Set(deletes.map(Number));
+  const fresh = new Map(upserts.map(r => [Number(r.id), r]));
+  const rows = state[tbl].filter(r => !gone.has(Number(r.id))).map(r => {
+    const u = fresh.get(Number(r.id));
+    fresh.delete(Number(r.id));
+    if (!u) return r;
+    const m = { ...r, ...u };
+    // search highlights describe the old text once title/description change
+    if (u.title !== undefined && u.title !== r.title) delete m.title_hl;
+    if (u.description !== undefined && u.description !== r.description) delete m.snippet;
+    return m;
+  });
+  // ranked search results are only refreshed in place
+  if (tbl === 'posts' && state.filters.q) { state.posts = rows; return; }
+  state[tbl] = rows.concat([...fresh.values()])
+    .filter(r => tbl !== 'posts' || postVisible(r))
+    .sort(rowOrder[tbl]);
+}
+
+// Would the server include this post in the pages loaded so far?
+// Tag comparison key: ASCII-only case folding, the same as COLLATE NOCASE on tags.name
+const tagKey = t => t.trim().replace(/[A-Z]/g, c => c.toLowerCase());
+
+function postVisible(p) {
+  const f = state.filters;
+  if (f.platform && p.platform !== f.platform) return false;
+  if (f.status && p.status !== f.status) return false;
+  if (f.tag && !(p.tags || '').split(',').some(t => tagKey(t) === tagKey(f.tag))) return false;
+  if (!state.postsCursor || !state.posts.length) return true;
+  const last = state.posts[state.posts.length - 1];
+  return rowOrder.posts(p, last) <= 0;
 }
 
 function render() {
   const app = $('#app');
-  if (!state.me) { app.innerHTML = renderLogin(); return; }
+  if (!state.me) { app.dataset.mount = ''; app.innerHTML = renderLogin(); return; }
+  if (state.view === 'posts') return mountPosts(app);
+  if (state.view === 'kanban') return mountKanban(app);
+  app.dataset.mount = '';
   switch (state.view) {
     case 'dashboard': app.innerHTML = renderDashboard(); break;
     case 'calendar': app.innerHTML = renderCalendar(); break;
-    case 'kanban': app.innerHTML = renderKanban(); break;
-    case 'posts': app.innerHTML = renderPosts(); break;
     case 'ideas': app.innerHTML = renderIdeas(); break;
     case 'todo': app.innerHTML = renderTodo(); break;
     case 'templates': app.innerHTML = renderTemplates(); break;
@@ -659,10 +2244,20 @@ function renderLogin() {
 }
 
 function renderDashboard() {
-  const next = state.posts.filter(p=>p.publish_at).sort((a,b)=>a.publish_at.localeCompare(b.publish_at)).slice(0,5);
-  const openTodos = state.todos.filter(t=>t.status==='open').slice(0,5);
+  const d = state.dashboard;
+  if (!d) return '<p>Ładowanie…</p>';
+  const next = d.upcoming, openTodos = d.todos;
   return `
   <div class="grid">
+    <div class="card">
+      <div class="section-title">Ten tydzień (${d.week.start} – ${d.week.end})</div>
+      <p><b>${d.week.total}</b> publikacji</p>
+      <ul>${Object.entries(d.week.by_platform).map(([p,n])=>`<li>${platformLabel(p)}: ${n}</li>`).join('')}</ul>
+    </div>
+    <div class="card">
+      <div class="section-title">Statusy</div>
+      <ul>${Object.entries(d.status_counts).map(([s,n])=>`<li>${statusLabel(s)}: ${n}</li>`).join('')}</ul>
+    </div>
     <div class="card">
       <div class="section-title">Nadchodzące publikacje</div>
       <table class="table">
@@ -679,22 +2274,60 @@ function renderDashboard() {
     <div class="card">
       <div class="section-title">Dzisiejsze To‑do</div>
       <ul>${openTodos.map(t=>`<li><label><input type="checkbox" data-todo="${t.id}" ${t.status==='done'?'checked':''}/> ${escapeHtml(t.title)}</label></li>`).join('')}</ul>
-      <button onclick="navTo('todo')">Otwórz To‑do →</button>
+      <button onclick="navTo('todo')">Otwórz To‑do (${d.todos_open}) →</button>
     </div>
   </div>`;
 }
 
+// Months fetched with posts_range, least recently used first; the neighbours of the
+// shown month are prefetched so navigation is instant. A failed fetch is kept on the
+// entry (e.error) instead of rejecting, and the entry leaves the cache so it is retried.
+const monthCache = new Map();
+const MONTH_CACHE_SIZE = 6;
+
+function monthEntry(month) {
+  const key = ymd(month).slice(0,7);
+  let e = monthCache.get(key);
+  if (e) { monthCache.delete(key); monthCache.set(key, e); return e; }
+  const last = new Date(month.getFullYear(), month.getMonth()+1, 0);
+  e = { days: null, truncated: false, error: null };
+  e.promise = api('posts_range', {}, 'GET', { from: ymd(month), to: ymd(last) })
+    .then(res => { e.days = res.days; e.truncated = res.truncated; })
+    .catch(err => { e.error = err; if (monthCache.get(key) === e) monthCache.delete(key); });
+  monthCache.set(key, e);
+  while (monthCache.size > MONTH_CACHE_SIZE) monthCache.delete(monthCache.keys().next().value);
+  return e;
+}
+
+function shiftMonth(delta) { state.calMonth = addMonths(state.calMonth, delta); render(); }
+
 function renderCalendar() {
-  const start = startOfMonth(new Date());
+  const start = state.calMonth;
+  monthEntry(addMonths(start, -1));
+  monthEntry(addMonths(start, 1));
+  const month = monthEntry(start);
+  if (!month.days) {
+    month.promise.then(()=>{
+      if (state.view !== 'calendar') return;
+      if (!month.error) return render();
+      const el = $('#calLoading');
+      if (el) el.innerHTML = 'Nie udało się wczytać kalendarza. <button onclick="render()">Spróbuj ponownie</button>';
+    });
+    return `<div class="card" id="calLoading">Ładowanie…</div>`;
+  }
   const days = buildMonthDays(start);
-  const postsByDate = groupBy(state.posts.filter(p=>p.publish_at), p => (p.publish_at||'').slice(0,10));
   return `
   <div class="card">
-    <div class="section-title">Kalendarz (miesiąc)</div>
+    <div class="section-title">
+      <button onclick="shiftMonth(-1)">←</button>
+      Kalendarz ${ymd(start).slice(0,7)}
+      <button onclick="shiftMonth(1)">→</button>
+    </div>
+    ${month.truncated ? `<p class="muted">Pokazano pierwsze 5000 postów z tego miesiąca – zawęź widok w liście postów.</p>` : ''}
     <div class="calendar">
       ${days.map(d=>{
-        const key = d.toISOString().slice(0,10);
-        const items = postsByDate[key] || [];
+        const key = ymd(d);
+        const items = month.days[key] || [];
         return `<div class="day">
           <header>${key}</header>
           <div>${items.map(p=>`<div class="card-item">${platformLabel(p.platform)} • ${escapeHtml(p.title)}</div>`).join('')}</div>
@@ -704,46 +2337,104 @@ function renderCalendar() {
   </div>`;
 }
 
+const KANBAN_STATUSES = ['idea','in_production','ready','scheduled','published'];
+
+// Posts and kanban keep their shell mounted and repaint only the row windows; the shell is
+// rebuilt when the view (or, for the table, the filter set) changes.
+const lists = {};
+
+function mountKanban(app) {
+  if (app.dataset.mount !== 'kanban') {
+    app.innerHTML = renderKanban();
+    app.dataset.mount = 'kanban';
+    for (const s of KANBAN_STATUSES) {
+      const col = app.querySelector(`.column[data-status="${s}"]`);
+      lists['kanban:' + s] = new VirtualList(col, col.querySelector('.cards'), { rowHeight: 112, key: p => p.id, html: kanbanCard });
+    }
+  }
+  const byStatus = Object.fromEntries(KANBAN_STATUSES.map(s => [s, []]));
+  for (const p of state.posts) byStatus[p.status]?.push(p);
+  for (const s of KANBAN_STATUSES) lists['kanban:' + s].setItems(byStatus[s]);
+  $('#kanbanMore').hidden = !state.postsCursor;
+}
+
 function renderKanban() {
-  const statuses = ['idea','in_production','ready','scheduled','published'];
   return `
   <div class="kanban">
-    ${statuses.map(s=>`<section class="column" data-status="${s}">
+    ${KANBAN_STATUSES.map(s=>`<section class="column vlist" data-status="${s}">
       <h4>${statusLabel(s)}</h4>
-      ${state.posts.filter(p=>p.status===s).slice(0,50).map(p=>`
+      <div class="cards"></div>
+    </section>`).join('')}
+  </div>
+  <button id="kanbanMore" onclick="loadMorePosts()">Załaduj więcej…</button>`;
+}
+
+function kanbanCard(p) {
+  return `
         <div class="card-item">
           <div><b>${escapeHtml(p.title)}</b></div>
           <div class="muted">${platformLabel(p.platform)}</div>
           <div class="row">
-            <button onclick="quickStatus(${p.id}, nextStatus('${s}'))">→ Następny</button>
+            <button onclick="quickStatus(${p.id}, nextStatus('${p.status}'))">→ Następny</button>
             <button onclick="editPost(${p.id})">Edytuj</button>
           </div>
-        </div>`).join('')}
-    </section>`).join('')}
-  </div>`;
+        </div>`;
+}
+
+function mountPosts(app) {
+  const key = 'posts:' + JSON.stringify(state.filters);
+  if (app.dataset.mount !== key) {
+    app.innerHTML = renderPosts();
+    app.dataset.mount = key;
+    lists.facetsRev = undefined;
+    lists.posts = new VirtualList($('#postsViewport'), $('#postsBody'), { rowHeight: 58, key: p => p.id, html: postRow, onNearEnd: loadMorePosts });
+  }
+  lists.posts.setItems(state.posts);
+  $('#postsMore').hidden = !state.postsCursor;
+  if (lists.facetsRev !== state.rev) { lists.facetsRev = state.rev; loadFacets(); }
+}
+
+// Tag chips with counts for the current filters; clicking one narrows the list to it
+async function loadFacets() {
+  const rows = await api('tags_facets', {}, 'GET', { ...state.filters, limit: 30 });
+  const box = $('#tagFacets');
+  if (!box) return;
+  const active = state.filters.tag;
+  box.innerHTML = (active ? `<button data-tag="">✕ #${escapeHtml(active)}</button>` : '') +
+    rows.filter(t => !active || tagKey(t.name) !== tagKey(active))
+        .map(t => `<button data-tag="${escapeHtmlAttr(t.name)}">#${escapeHtml(t.name)} (${t.cnt})</button>`).join('');
 }
 
 function renderPosts() {
   const platforms = ['', 'youtube_long','youtube_short','instagram','tiktok'];
   const statuses = ['', 'idea','in_production','ready','scheduled','published'];
-  const rows = state.posts;
   return `
   <div class="card">
     <div class="section-title">Lista postów</div>
     <div class="row" style="display:flex; gap:.5rem; flex-wrap:wrap;">
       <select id="filterPlatform">${platforms.map(p=>`<option value="${p}" ${state.filters.platform===p?'selected':''}>${p?platformLabel(p):'Platforma'}</option>`).join('')}</select>
       <select id="filterStatus">${statuses.map(s=>`<option value="${s}" ${state.filters.status===s?'selected':''}>${s?statusLabel(s):'Status'}</option>`).join('')}</select>
-      <input id="filterQ" placeholder="Szukaj..." value="${state.filters.q||''}"/>
+      <input id="filterQ" placeholder="Szukaj..." value="${escapeHtmlAttr(state.filters.q||'')}"/>
       <button onclick="applyFilters()">Filtruj</button>
       <button id="newPostBtn" class="primary" onclick="newPost()">+ Nowy post</button>
       <a href="export_csv.php" target="_blank">Eksport CSV</a>
       <a href="export_ics.php" target="_blank">Eksport .ics</a>
     </div>
-    <table class="table">
-      <thead><tr><th>ID</th><th>Tytuł</th><th>Platforma</th><th>Status</th><th>Publikacja</th><th>Tagi</th><th>Akcje</th></tr></thead>
-      <tbody>${rows.map(p=>`<tr>
+    <div id="tagFacets" class="row" style="display:flex; gap:.25rem; flex-wrap:wrap; margin:.5rem 0;"></div>
+    <div class="vlist" id="postsViewport">
+      <table class="table">
+        <thead><tr><th style="width:4rem">ID</th><th style="width:35%">Tytuł</th><th>Platforma</th><th>Status</th><th>Publikacja</th><th>Tagi</th><th style="width:11rem">Akcje</th></tr></thead>
+        <tbody id="postsBody"></tbody>
+      </table>
+    </div>
+    <button id="postsMore" onclick="loadMorePosts()">Załaduj więcej…</button>
+  </div>`;
+}
+
+function postRow(p) {
+  return `<tr>
         <td>${p.id}</td>
-        <td>${escapeHtml(p.title)}</td>
+        <td>${p.title_hl ? markHtml(p.title_hl) : escapeHtml(p.title)}${p.snippet ? `<div class="muted">${markHtml(p.snippet)}</div>` : ''}</td>
         <td>${platformLabel(p.platform)}</td>
         <td>${statusLabel(p.status)}</td>
         <td>${(p.publish_at||'').replace('T',' ')}</td>
@@ -752,9 +2443,55 @@ function renderPosts() {
           <button onclick="editPost(${p.id})">Edytuj</button>
           <button onclick="duplicatePost(${p.id})">Duplikuj</button>
         </td>
-      </tr>`).join('')}</tbody>
-    </table>
-  </div>`;
+      </tr>`;
+}
+
+// Windowed list: only rows in (or near) the viewport exist in the DOM, two spacers stand in
+// for the rest. Rows are keyed, so a repaint keeps the element of every row whose data object
+// is unchanged and builds markup only for rows that are new or were replaced by a sync merge.
+class VirtualList {
+  constructor(viewport, body, opts) {
+    Object.assign(this, { viewport, body, items: [], nodes: new Map(), overscan: 8, measured: false }, opts);
+    this.top = this.spacer();
+    this.bottom = this.spacer();
+    body.replaceChildren(this.top, this.bottom);
+    let queued = false;
+    viewport.addEventListener('scroll', () => {
+      if (queued) return;
+      queued = true;
+      requestAnimationFrame(() => { queued = false; this.paint(); });
+    }, { passive: true });
+  }
+  spacer() {
+    return htmlToElement(this.body.tagName === 'TBODY' ? '<tr class="vspace"><td colspan="99"></td></tr>' : '<div class="vspace"></div>');
+  }
+  setItems(items) { this.items = items; this.paint(); }
+  paint() {
+    const h = this.rowHeight, n = this.items.length, top = this.viewport.scrollTop;
+    const first = Math.min(n, Math.max(0, Math.floor(top / h) - this.overscan));
+    const last = Math.min(n, Math.ceil((top + this.viewport.clientHeight) / h) + this.overscan);
+    const keep = new Map();
+    for (let i = first; i < last; i++) {
+      const row = this.items[i], k = this.key(row), old = this.nodes.get(k);
+      keep.set(k, old && old.row === row ? old : { row, el: htmlToElement(this.html(row)) });
+    }
+    for (const [k, node] of this.nodes) if (keep.get(k) !== node) node.el.remove();
+    let at = this.top.nextSibling;
+    for (const { el } of keep.values()) {
+      if (el === at) at = at.nextSibling; else this.body.insertBefore(el, at);
+    }
+    this.nodes = keep;
+    this.top.style.height = first * h + 'px';
+    this.bottom.style.height = (n - last) * h + 'px';
+    // rows are styled to a fixed height; rowHeight is only the first guess until measured
+    if (!this.measured && keep.size > 1) {
+      const [a, b] = keep.values();
+      const real = b.el.offsetTop - a.el.offsetTop;
+      this.measured = true;
+      if (real > 0 && real !== h) { this.rowHeight = real; return this.paint(); }
+    }
+    if (this.onNearEnd && last >= n - this.overscan) this.onNearEnd();
+  }
 }
 
 function renderIdeas() {
@@ -814,7 +2551,8 @@ function renderTemplates() {
       <ul>${state.templates.map(t=>`<li><b>${escapeHtml(t.name)}</b> — ${escapeHtml(t.days_of_week)} • ${escapeHtml(t.platforms)}
         <div>
           <label>Poniedziałek tygodnia: <input type="date" id="weekStart-${t.id}"/></label>
-          <button onclick="instantiateTemplate(${t.id})">Wygeneruj tydzień</button>
+          <label>Tygodni: <input type="number" id="weeks-${t.id}" min="1" max="52" value="1" style="width:5rem"/></label>
+          <button onclick="instantiateTemplate(${t.id})">Wygeneruj</button>
         </div>
       </li>`).join('')}</ul>
     </div>
@@ -830,7 +2568,9 @@ function renderSettings() {
     </div>
     <div class="card">
       <div class="section-title">Kopie zapasowe</div>
-      <a href="backup.php" target="_blank">Pobierz kopię bazy</a>
+      <p><a href="backup.php" target="_blank">Pełna kopia bazy (.sqlite.gz)</a></p>
+      <label>Przyrostowa od rewizji <input type="number" id="backupSince" min="0" placeholder="X-Backup-Rev"/></label>
+      <button onclick="downloadIncremental()">Pobierz zmiany</button>
     </div>
     <div class="card">
       <div class="section-title">Skróty klawiszowe</div>
@@ -860,9 +2600,13 @@ document.addEventListener('click', (e)=>{
     e.preventDefault();
     navTo(e.target.getAttribute('data-view'));
   }
+  if (e.target.matches('#tagFacets [data-tag]')) {
+    state.filters.tag = e.target.getAttribute('data-tag');
+    applyFilters();
+  }
   if (e.target.id === 'logoutLink') {
     e.preventDefault();
-    api('logout', {}, 'POST').then(()=>{ state.me=null; render(); });
+    api('logout', {}, 'POST').then(()=>{ Object.assign(state, {me: null, rev: null, dashboard: null, loaded: false}); render(); });
   }
   if (e.target.id === 'menuBtn') {
     $('#sidebar').classList.toggle('open');
@@ -872,7 +2616,7 @@ document.addEventListener('click', (e)=>{
 
 document.addEventListener('change', (e)=>{
   if (e.target.matches('input[type="checkbox"][data-todo]')) {
-    api('todos_toggle', { id: Number(e.target.getAttribute('data-todo')), csrf: state.csrf }).then(loadAll).then(render);
+    mutate('todos_toggle', { id: Number(e.target.getAttribute('data-todo')), csrf: state.csrf }).then(render);
   }
 });
 
@@ -881,18 +2625,18 @@ document.addEventListener('submit', (e)=>{
     e.preventDefault();
     const fd = new FormData(e.target);
     api('login', { email: fd.get('email'), password: fd.get('password') }).then(async ()=>{
-      await checkMe(); await loadAll(); render();
+      await checkMe(); await ensureData(state.view); render();
     }).catch(()=>toast('Błędny login lub hasło.'));
   }
   if (e.target.id === 'ideaForm') {
     e.preventDefault();
     const fd = new FormData(e.target);
-    api('ideas_create', { title: fd.get('title'), description: fd.get('description'), category: fd.get('category'), csrf: state.csrf }).then(loadAll).then(render);
+    mutate('ideas_create', { title: fd.get('title'), description: fd.get('description'), category: fd.get('category'), csrf: state.csrf }).then(render);
   }
   if (e.target.id === 'todoForm') {
     e.preventDefault();
     const fd = new FormData(e.target);
-    api('todos_create', { title: fd.get('title'), description: fd.get('description'), due_date: fd.get('due_date'), csrf: state.csrf }).then(loadAll).then(render);
+    mutate('todos_create', { title: fd.get('title'), description: fd.get('description'), due_date: fd.get('due_date'), csrf: state.csrf }).then(render);
   }
   if (e.target.id === 'postForm') {
     e.preventDefault();
@@ -902,17 +2646,21 @@ document.addEventListener('submit', (e)=>{
     const payload = { post, csrf: state.csrf };
     const action = post.id ? 'posts_update' : 'posts_create';
     if (post.id) payload.id = Number(post.id);
-    api(action, payload).then(loadAll).then(()=>{ navTo('posts'); });
+    mutate(action, payload).then(()=>{ $('#postEditor')?.remove(); navTo('posts'); });
   }
   if (e.target.id === 'tplForm') {
     e.preventDefault();
     const fd = new FormData(e.target);
-    api('templates_create', { name: fd.get('name'), days_of_week: fd.get('days'), platforms: fd.get('platforms'), csrf: state.csrf }).then(loadAll).then(render);
+    mutate('templates_create', { name: fd.get('name'), days_of_week: fd.get('days'), platforms: fd.get('platforms'), csrf: state.csrf }).then(render);
   }
 });
 
-function newPost() { $('#app').insertAdjacentHTML('beforeend', postEditor()); }
-function editPost(id) { const p = state.posts.find(x=>x.id==id); $('#app').insertAdjacentHTML('beforeend', postEditor(p)); }
+function newPost() { $('#postEditor')?.remove(); $('#app').insertAdjacentHTML('beforeend', postEditor()); }
+async function editPost(id) {
+  const p = await api('posts_get', {}, 'GET', { id });
+  $('#postEditor')?.remove();
+  $('#app').insertAdjacentHTML('beforeend', postEditor(p));
+}
 function postEditor(p={}) {
   return `
   <div class="card" id="postEditor">
@@ -943,11 +2691,11 @@ function postEditor(p={}) {
 function duplicatePost(id) {
   const platforms = prompt('Na jakie platformy skopiować? Np.: instagram,tiktok');
   if (!platforms) return;
-  api('posts_duplicate_to_platforms', { id, platforms: platforms.split(',').map(s=>s.trim()), csrf: state.csrf }).then(loadAll).then(render);
+  mutate('posts_duplicate_to_platforms', { id, platforms: platforms.split(',').map(s=>s.trim()), csrf: state.csrf }).then(render);
 }
 
 function quickStatus(id, next) {
-  api('posts_update', { id, post: { status: next }, csrf: state.csrf }).then(loadAll).then(render);
+  mutate('posts_update', { id, post: { status: next }, csrf: state.csrf }).then(render);
 }
 function nextStatus(s) {
   const order = ['idea','in_production','ready','scheduled','published'];
@@ -965,7 +2713,8 @@ function applyFilters() {
 function instantiateTemplate(id) {
   const v = document.getElementById(`weekStart-${id}`).value;
   if (!v) return toast('Wybierz poniedziałek tygodnia.');
-  api('templates_instatiate_week', { template_id: id, start_date: v, csrf: state.csrf }).then(loadAll).then(()=>navTo('calendar'));
+  const weeks = Number(document.getElementById(`weeks-${id}`).value) || 1;
+  mutate('templates_instatiate_week', { template_id: id, start_date: v, weeks, csrf: state.csrf }).then(()=>navTo('calendar'));
 }
 
 function loadWeeklyReport() {
@@ -981,15 +2730,27 @@ function loadSeriesReport() {
   });
 }
 
+function downloadIncremental() {
+  const since = $('#backupSince').value;
+  if (since === '') return toast('Podaj rewizję poprzedniej kopii.');
+  window.open('backup.php?since=' + encodeURIComponent(since), '_blank');
+}
+
 function toggleTheme() {
   const cur = document.documentElement.getAttribute('data-theme');
   setTheme(cur === 'light' ? 'dark' : 'light');
 }
 
-function escapeHtml(s='') { const div = document.createElement('div'); div.textContent = s; return div.innerHTML; }
-function escapeHtmlAttr(s='') { return (s+'').replace(/"/g,'&quot;'); }
-function groupBy(arr, keyFn){ return arr.reduce((m,x)=>{const k=keyFn(x); (m[k]=m[k]||[]).push(x); return m},{}); }
+const HTML_ESCAPES = { '&':'&amp;', '<':'&lt;', '>':'&gt;', '"':'&quot;', "'":'&#39;' };
+function escapeHtml(s='') { return String(s ?? '').replace(/[&<>"']/g, c => HTML_ESCAPES[c]); }
+function markHtml(s='') { return escapeHtml(s).replace(/\\u0002/g,'<mark>').replace(/\\u0003/g,'</mark>'); }
+function escapeHtmlAttr(s='') { return escapeHtml(s); }
+const htmlTemplate = document.createElement('template');
+function htmlToElement(html) { htmlTemplate.innerHTML = html.trim(); return htmlTemplate.content.firstElementChild; }
+function cmp(a, b) { a = a ?? ''; b = b ?? ''; return a < b ? -1 : a > b ? 1 : 0; }
 function startOfMonth(d){ return new Date(d.getFullYear(), d.getMonth(), 1); }
+function addMonths(d, n){ return new Date(d.getFullYear(), d.getMonth()+n, 1); }
+function ymd(d){ return `${d.getFullYear()}-${String(d.getMonth()+1).padStart(2,'0')}-${String(d.getDate()).padStart(2,'0')}`; }
 function buildMonthDays(start){ const days=[]; const cur = new Date(start.getFullYear(), start.getMonth(), 1); const month = cur.getMonth(); while (cur.getMonth()===month){ days.push(new Date(cur)); cur.setDate(cur.getDate()+1); } return days; }
 
 (async function() {
@@ -997,20 +2758,217 @@ function buildMonthDays(start){ const days=[]; const cur = new Date(start.getFul
     if (e.target.matches('a')) document.getElementById('sidebar').classList.remove('open');
   });
   await checkMe();
-  if (state.me) { await loadAll(); }
+  await ensureData(state.view);
   shortcutSetup();
   render();
 })();
 """))
 
+# Fingerprinted, precompressed assets: a minified copy of each file named by its content hash,
+# with .gz and (when brotli is available) .br siblings. index.php is pointed at them and
+# assets/.htaccess (Apache) / router.php (php -S) serve them as immutable.
+def minify_css(css):
+    css = re.sub(r"/\*.*?\*/", "", css, flags=re.S)
+    css = re.sub(r"\s+", " ", css)
+    css = re.sub(r"\s*([{};,>])\s*", r"\1", css)
+    return re.sub(r":\s+", ":", css).replace(";}", "}").strip() + "\n"
+
+
+# a "/" after one of these tokens starts a regex literal; after anything else it divides
+JS_REGEX_AFTER = set("(,=:[!&|?{};+-*%<>~^") | {"return", "typeof", "instanceof", "in", "of", "new", "delete",
+                                               "void", "throw", "case", "do", "else", "yield", "await"}
+
+
+def minify_js(js):
+    """Drop comments, indentation and blank lines; strings, template literals and regexes
+    are copied as they are. Line breaks stay, so automatic semicolon insertion is unaffected."""
+    out, i, n = [], 0, len(js)
+    depth, templates = 0, []  # brace depth; depth at each open ${ of a template literal
+    prev = ""  # last token (punctuator character or whole word), to tell a regex from a division
+
+    def scan(j, end):
+        while not js.startswith(end, j):
+            j += 2 if js[j] == "\\" else 1
+        return j
+
+    while i < n:
+        c = js[i]
+        if c in "'\"":
+            j = scan(i + 1, c) + 1
+            out.append(js[i:j]); prev = c; i = j
+        elif c == "`" or (c == "}" and templates and templates[-1] == depth):
+            if c == "}":
+                templates.pop()
+            j = i + 1
+            while js[j] != "`" and not js.startswith("${", j):
+                j += 2 if js[j] == "\\" else 1
+            if js[j] == "`":
+                out.append(js[i:j + 1]); prev = "`"; i = j + 1
+            else:
+                out.append(js[i:j + 2]); templates.append(depth); prev = "{"; i = j + 2
+        elif js.startswith("//", i):
+            j = js.find("\n", i)
+            i = n if j < 0 else j
+        elif js.startswith("/*", i):
+            i = js.index("*/", i) + 2
+        elif c == "/" and (not prev or prev in JS_REGEX_AFTER):
+            j, in_class = i + 1, False
+            while in_class or js[j] != "/":
+                if js[j] == "\\":
+                    j += 1
+                elif js[j] in "[]":
+                    in_class = js[j] == "["
+                j += 1
+            j += 1
+            while j < n and js[j].isalpha():
+                j += 1
+            out.append(js[i:j]); prev = "/"; i = j
+        elif c in " \t\r":
+            j = i
+            while j < n and js[j] in " \t\r":
+                j += 1
+            last, nxt = (out[-1][-1] if out else "\n"), (js[j] if j < n else "\n")
+            if (last.isalnum() or last in "_$") and (nxt.isalnum() or nxt in "_$") or last + nxt in ("++", "--"):
+                out.append(" ")
+            i = j
+        elif c == "\n":
+            if out and out[-1][-1] != "\n":
+                out.append("\n")
+            i += 1
+        elif c.isalnum() or c in "_$":
+            j = i + 1
+            while j < n and (js[j].isalnum() or js[j] in "_$"):
+                j += 1
+            out.append(js[i:j]); prev = js[i:j]; i = j
+        else:
+            depth += (c == "{") - (c == "}")
+            out.append(c); prev = c; i += 1
+    return "".join(out).strip() + "\n"
+
+
+def check_js(name, data):
+    """Parse minified JS with node --check when node is installed: a minifier slip (say a regex
+    read as a division) stops the build instead of shipping a broken bundle."""
+    if not shutil.which("node"):
+        return
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, name)
+        pathlib.Path(path).write_bytes(data)
+        res = subprocess.run(["node", "--check", path], capture_output=True, text=True)
+    if res.returncode:
+        sys.exit(f"minified {name} does not parse:\n{res.stderr}")
+
+
+def brotli_compress(data):
+    """Brotli via the brotli module or CLI; None when neither is installed (gzip only then)."""
+    try:
+        import brotli
+        return brotli.compress(data, quality=11)
+    except ImportError:
+        pass
+    if shutil.which("brotli"):
+        return subprocess.run(["brotli", "-c", "-q", "11"], input=data, capture_output=True, check=True).stdout
+    return None
+
+
+def gzip_compress(data):
+    # mtime=0: the same input gives the same .gz bytes
+    return gzip.compress(data, 9, mtime=0)
+
+
+# the code that turns a source into its assets: a cached output is only reused while it is unchanged
+ASSET_PIPELINE = sha256("".join(inspect.getsource(f) for f in (minify_css, minify_js, gzip_compress, brotli_compress)).encode()
+                        + repr(sorted(JS_REGEX_AFTER)).encode())
+
+
+# minifying and compressing are most of the generation time: for an unchanged source and
+# pipeline the last run's output is reused (the manifest maps each source + ASSET_PIPELINE
+# hash to its fingerprinted name)
+asset_names, asset_sources = {}, {}
+for name, minify in [("style.css", minify_css), ("app.js", minify_js)]:
+    source = files.pop(f"assets/{name}")
+    asset_sources[name] = [sha256(ASSET_PIPELINE.encode() + source), None]
+    last_hash, last_name = previous_assets.get(name, [None, None])
+    data = previous_output(last_name) if last_hash == asset_sources[name][0] and last_name else None
+    cached = data is not None
+    if not cached:
+        data = minify(source.decode("utf-8")).encode("utf-8")
+        if name.endswith(".js"):
+            check_js(name, data)
+    stem, ext = name.rsplit(".", 1)
+    hashed = asset_sources[name][1] = f"assets/{stem}.{sha256(data)[:10]}.{ext}"
+    files[hashed] = data
+    for suffix, compress in [(".gz", gzip_compress), (".br", brotli_compress)]:
+        packed = (cached and previous_output(hashed + suffix)) or compress(data)
+        if packed is not None:
+            files[hashed + suffix] = packed
+    asset_names[f"assets/{name}"] = hashed
+
+html = files["index.php"].decode("utf-8")
+for plain, hashed in asset_names.items():
+    html = html.replace(f'"{plain}"', f'"{hashed}"')
+emit("index.php", html)
+
+# assets/.htaccess
+emit("assets/.htaccess", textwrap.dedent("""\
+# Fingerprinted assets (name.<hash>.js / .css) never change under the same name: cached for a
+# year without revalidation. The precompressed .br / .gz sibling is sent when accepted.
+AddEncoding br .br
+AddEncoding gzip .gz
+
+<IfModule mod_rewrite.c>
+    RewriteEngine On
+    RewriteCond %{HTTP:Accept-Encoding} \\bbr\\b
+    RewriteCond %{REQUEST_FILENAME}.br -f
+    RewriteRule ^(.+\\.[0-9a-f]{10}\\.(js|css))$ $1.br [E=no-gzip:1,L]
+    RewriteCond %{HTTP:Accept-Encoding} \\bgzip\\b
+    RewriteCond %{REQUEST_FILENAME}.gz -f
+    RewriteRule ^(.+\\.[0-9a-f]{10}\\.(js|css))$ $1.gz [E=no-gzip:1,L]
+</IfModule>
+
+<IfModule mod_headers.c>
+    <FilesMatch "\\.[0-9a-f]{10}\\.(js|css)(\\.br|\\.gz)?$">
+        Header set Cache-Control "public, max-age=31536000, immutable"
+        Header append Vary Accept-Encoding
+    </FilesMatch>
+</IfModule>
+"""))
+
+# router.php
+emit("router.php", textwrap.dedent("""\
+<?php
+// Router for the built-in server: php -S localhost:8000 router.php
+// Fingerprinted assets get what assets/.htaccess gives them under Apache (immutable caching,
+// precompressed .br / .gz); every other request is left to the built-in server.
+$path = parse_url($_SERVER['REQUEST_URI'], PHP_URL_PATH);
+if (!preg_match('#^/assets/[\\w-]+\\.[0-9a-f]{10}\\.(js|css)$#', $path, $m) || !is_file(__DIR__ . $path)) {
+    return false;
+}
+$file = __DIR__ . $path;
+header('Content-Type: ' . ($m[1] === 'js' ? 'text/javascript' : 'text/css') . '; charset=utf-8');
+header('Cache-Control: public, max-age=31536000, immutable');
+header('Vary: Accept-Encoding');
+$accept = $_SERVER['HTTP_ACCEPT_ENCODING'] ?? '';
+foreach (['br' => '.br', 'gzip' => '.gz'] as $encoding => $ext) {
+    if (preg_match('/\\b' . $encoding . '\\b/', $accept) && is_file($file . $ext)) {
+        header('Content-Encoding: ' . $encoding);
+        $file .= $ext;
+        break;
+    }
+}
+header('Content-Length: ' . filesize($file));
+readfile($file);
+?>
+"""))
+
 # README
-open(f"{base}/README.md","w").write(textwrap.dedent("""
+emit("README.md", textwrap.dedent("""
 # Solo Creator Planner (PHP + SQLite)
 Minimalna aplikacja webowa do planowania i produkcji treści (YouTube, Instagram Reels, TikTok).
 
 ## Szybki start (lokalnie z PHP)
 1. Uruchom w katalogu projektu:  
-   `php -S localhost:8000`
+   `php -S localhost:8000 router.php`
 2. Otwórz: http://localhost:8000
 3. Zaloguj się: **admin@example.com** / **admin** (zmień hasło po pierwszym logowaniu).
 
@@ -1018,14 +2976,23 @@ Minimalna aplikacja webowa do planowania i produkcji treści (YouTube, Instagram
 - `index.php` – UI (SPA, AJAX)
 - `api.php` – REST‑owe endpoints (JSON)
 - `db.php` – połączenie z SQLite + inicjalizacja schematu
-- `auth.php` – sesje, CSRF
+- `config.php` – tryb uwierzytelniania, klucz podpisu
+- `auth.php` – sesje / tokeny, CSRF
 - `export_csv.php`, `export_ics.php`, `backup.php` – eksport/kopie
-- `assets/style.css`, `assets/app.js` – frontend
-- `schema.sql` – definicja bazy
+- `assets/style.<hash>.css`, `assets/app.<hash>.js` – frontend (zminifikowany, z wersjami `.gz` / `.br`)
+- `router.php` – router dla `php -S`, `assets/.htaccess` – to samo dla Apache
+- `schema.sql` – definicja bazy (nowa baza)
+- `migrations.php`, `migrate.php` – numerowane migracje schematu i ich wykonawca
+
+## Generowanie
+- projekt i `solo-creator-app.zip` powstają z `test.py`; ponowne uruchomienie zapisuje tylko zmienione pliki (lista z hashami w `.manifest.json`), usuwa pliki, których już nie generuje, i nie rusza danych (`data.sqlite`, `logs/`)
+- archiwum ma posortowane wpisy i stałe znaczniki czasu – te same źródła dają identyczny zip
+- `python test.py --check` – różnice między wygenerowanym wynikiem a dyskiem, bez zapisu (kod wyjścia 1 przy różnicach)
 
 ## Bezpieczeństwo
-- Logowanie z hasłem (bcrypt), sesja PHP
-- CSRF token w żądaniach modyfikujących
+- Logowanie z hasłem (bcrypt), sesja PHP otwierana tylko do odczytu (blokada zwalniana od razu, równoległe żądania nie czekają na siebie)
+- Alternatywnie `AUTH_MODE = 'token'` w `config.php`: bezstanowe ciasteczko podpisane HMAC (klucz z `APP_SECRET` lub `.app_secret.php`), bez plików sesji
+- CSRF token w żądaniach modyfikujących (w trybie token wyprowadzany z podpisanego ciasteczka)
 - PDO + prepared statements (SQLi)
 - Sanityzacja danych na wyjściu (escape HTML po stronie klienta)
 
@@ -1036,27 +3003,150 @@ Minimalna aplikacja webowa do planowania i produkcji treści (YouTube, Instagram
 
 ## Automatyzacje
 - Duplikacja posta na różne platformy (`posts_duplicate_to_platforms`)
-- Generowanie tygodnia z szablonu (`templates_instatiate_week`)
+- Generowanie tygodni z szablonu (`templates_instatiate_week`, parametr `weeks` – do 52 tygodni naraz, jedna transakcja)
 
 ## Raporty
+- `dashboard_summary` – dane pulpitu: 5 najbliższych publikacji, 5 otwartych zadań wg terminu, liczby wg statusu i sumy bieżącego tygodnia (z indeksów i tabeli rollup, w jednej transakcji odczytu)
 - `report_weekly` – agregacja wg platformy/statusu w zakresie tygodnia
-- `report_series_effectiveness` – podsumowanie wg serii
+- `report_series_effectiveness` – podsumowanie wg serii (opcjonalnie `from`/`to`)
+- oba raporty czytają z `posts_daily_rollup` (liczniki dzienne utrzymywane triggerami), więc koszt zależy od zakresu dat, nie od historii postów; `rollup_rebuild` przelicza tabelę od zera
+
+## Tagi
+- `posts.tags` (lista po przecinku) jest kopiowana do `tags` / `post_tags` przy tworzeniu, edycji i duplikowaniu postów
+- `posts_list?tag=nazwa` – filtr po tagu przez indeks `post_tags(tag_id, post_id)`; koszt zależy od liczby postów z tagiem
+- `tags_facets` – liczby postów per tag dla bieżących filtrów (`platform`, `status`, `q`, `tag`, `limit`)
+- `tags_rebuild` – jednorazowe wypełnienie tabel tagów z istniejących postów (np. po aktualizacji starej bazy)
+
+## Wyszukiwanie
+- `posts_list?q=` – pełnotekstowe (SQLite FTS5) po tytule, opisie i tagach; dopasowanie prefiksów, ranking bm25, podświetlone fragmenty
+
+## Paginacja
+- `posts_list` zwraca `{rows, next_cursor}`; kolejne strony: `&cursor=<next_cursor>`, rozmiar strony `&limit=` (domyślnie 100, max 500)
+- lista postów i kolumny kanbanu renderują tylko wiersze widoczne w oknie przewijania; po zmianie danych podmieniane są wyłącznie zmienione wiersze (klucz = id), a kolejne strony dociągają się przy dojściu do końca listy
+
+## Kalendarz
+- `posts_range?from=YYYY-MM-DD&to=YYYY-MM-DD` – posty z danego zakresu pogrupowane po dniach (zakres po indeksie `publish_at`); najwyżej 5000, `truncated: true` gdy w zakresie jest ich więcej
+- widok kalendarza ma nawigację po miesiącach; sąsiednie miesiące są pobierane z wyprzedzeniem do małego cache LRU
+
+## Projekcje
+- `posts_list` / `changes_since`: `view=kanban|calendar|table` lub `fields=title,status,...` zwraca tylko potrzebne kolumny (zawsze `id` i `sort_at`); bez parametru – pełny wiersz
+- `posts_get?id=` – pełny post (z opisem), pobierany dopiero przy otwarciu edytora
+
+## Synchronizacja przyrostowa
+- `changes_since?since=<rev>` – tylko wiersze dodane/zmienione/usunięte po tokenie `rev` (log `changes` utrzymywany triggerami, usunięcia jako tombstone); bez `since` zwraca bieżący token
+- frontend po każdej zmianie scala delty w stanie zamiast przeładowywać wszystkie kolekcje
+- `batch` – `{requests: {klucz: {action, params}}}` wykonuje wiele akcji w jednym żądaniu i jednej transakcji (spójny snapshot), wyniki pod tymi samymi kluczami; start aplikacji i odświeżenie po zmianie to jedno żądanie
+
+## Cache (ETag)
+- akcje odczytu (`posts_list`, `ideas_list`, `todos_list`, `series_list`, `templates_list`, raporty) oraz eksporty CSV/ICS wysyłają `ETag` wyliczany z rewizji czytanych tabel (ostatni wpis w logu `changes`)
+- `If-None-Match` (lub `if_none_match` w `batch`) z aktualnym ETagiem daje `304` bez wykonywania zapytania
+- `rollup_rebuild` / `tags_rebuild` zapisują w logu nową rewizję `posts_daily_rollup` / `post_tags`, więc raporty i listy czytające te tabele dostają nowy ETag
 
 ## Eksport
 - CSV: `/export_csv.php`
-- iCalendar (.ics): `/export_ics.php` (wydarzenia z `scheduled` i `published`)
+- iCalendar (.ics): `/export_ics.php` (wydarzenia z `scheduled` i `published`); okno dat dla subskrypcji: `?days=90` (naprzód) i `?past=7` (wstecz)
+- ICS jest strumieniowany wiersz po wierszu, obsługuje `ETag`/`Last-Modified`, a fragmenty VEVENT są cache'owane w APCu (jeśli dostępne)
+
+## Kopie zapasowe
+- `backup.php` – spójny snapshot przez `VACUUM INTO` (bez blokowania zapisów), sprawdzony `PRAGMA quick_check`, strumieniowany jako gzip; nagłówek `X-Backup-Rev` podaje rewizję snapshotu
+- `backup.php?since=<rev>` – kopia przyrostowa: tylko wiersze zmienione/usunięte po danej rewizji (gzip JSONL)
+
+## Połączenie z bazą
+- profil połączenia w `config.php` (`DB_*`): WAL (odczyty nie czekają na zapis i odwrotnie), `synchronous=NORMAL`, `busy_timeout` 5 s zamiast natychmiastowego `SQLITE_BUSY`, `mmap_size` i `cache_size` dobierane do rozmiaru bazy (z limitami)
+- na końcu żądania, które coś zapisało, `PRAGMA optimize` (bez czekania na blokadę zapisu), a WAL większy niż `DB_WAL_TRUNCATE_BYTES` jest checkpointowany i obcinany; opcjonalnie trwałe połączenia (`DB_PERSISTENT`, wtedy bez pomiaru czasu pojedynczych zapytań)
+- `python bench_concurrency.py` – równoległe odczyty (raporty, pulpit, listy) i zapisy (zmiany statusu) w osobnych procesach, przepustowość i opóźnienia przed i po profilu
+
+## Zasoby statyczne
+- `test.py` minifikuje CSS i JS, nadaje plikom nazwy z hashem treści (`app.<hash>.js`) i podmienia odwołania w `index.php`
+- obok każdego pliku leży wersja `.gz` oraz `.br` (gdy dostępny jest moduł lub program `brotli`); serwer wysyła ją zgodnie z `Accept-Encoding`
+- nagłówek `Cache-Control: public, max-age=31536000, immutable` – przy kolejnych wizytach przeglądarka nie pobiera ani nie rewaliduje zasobów; nowa wersja ma nową nazwę
+
+## Migracje schematu
+- wersja schematu to `PRAGMA user_version`; `db()` porównuje ją z `SCHEMA_VERSION` raz na połączenie i tylko przy starszej bazie ładuje `migrate.php`
+- `migrations.php` i `schema.sql` generuje `test.py` z jednej listy migracji; nowa baza dostaje od razu pełny schemat i bieżącą wersję
+- starsze bazy (także prototyp z `publish_date` / `weekdays`) są podnoszone krok po kroku: zmiany struktury w krótkich transakcjach, a wypełnianie istniejących wierszy (FTS, `posts_daily_rollup`, `post_tags`) partiami po `MIGRATE_CHUNK` postów, każda w osobnej transakcji
+- żądanie WWW poświęca na to najwyżej `MIGRATE_BUDGET_MS`, kolejne kontynuują; `php migrate.php` wykonuje całość od razu; postęp w tabeli `schema_migrations`
+
+## Import / eksport hurtowy
+- `python datatool.py import posty.csv` – CSV w układzie `export_csv.php`; `.jsonl` (także `.gz`) przyjmuje linie kopii przyrostowej `backup.php?since=` lub zwykłe wiersze (`--table`)
+- `python datatool.py import --synthetic 100000` – realistyczne dane testowe (posty, serie, pomysły, zadania)
+- `python datatool.py export -o posty.csv` / `export --format jsonl --table all`
+- zapis partiami `executemany` (domyślnie 5000 wierszy na transakcję), WAL i `synchronous=OFF` tylko na czas importu; triggery aplikacji działają, `post_tags` jest uzupełniane po imporcie
+
+## Pomiary wydajności
+- każda odpowiedź API ma nagłówek `Server-Timing` (fazy `connect`, `session`, `sql`, `respond`, `total`)
+- po każdym żądaniu do `logs/perf.log` dopisywana jest linia JSON: akcja, status, czasy faz, liczba zapytań, wierszy i bajtów; plik rotuje po 5 MB (`PERF_*` w `config.php`)
+- analiza: `python perf_report.py logs/perf.log` (p50/p95/p99 per akcja), porównanie: `python perf_report.py nowy.log --baseline stary.log` (kod wyjścia 1 przy regresji)
+- `logs/slow.log` – zapytania trwające co najmniej `PERF_SLOW_MS` (domyślnie 50 ms) z planem `EXPLAIN QUERY PLAN`, typami parametrów (bez wartości), liczbą wierszy i flagami `full_scan` / `temp_btree`; szybsze zapytania trafiają tam losowo z prawdopodobieństwem `PERF_SLOW_SAMPLE`
 
 ## Uwaga
-To szkielet MVP. Warto dodać: zmianę hasła, role zespołowe, drag&drop w Kanban, integracje API, paginację, testy.
+To szkielet MVP. Warto dodać: zmianę hasła, role zespołowe, drag&drop w Kanban, integracje API, testy.
 """))
 
-# Zip the project
-zip_path = "/mnt/data/solo-creator-app.zip"
-with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED) as z:
-    for root, _, files in os.walk(base):
-        for f in files:
-            full = os.path.join(root, f)
-            rel = os.path.relpath(full, base)
-            z.write(full, arcname=f"solo-creator-app/{rel}")
-
-zip_path
\ No newline at end of file
+# Sync base and the zip with `files`
+def zip_bytes(files):
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as z:
+        for rel in sorted(files):
+            info = zipfile.ZipInfo(f"solo-creator-app/{rel}", date_time=ZIP_DATE)
+            info.compress_type = zipfile.ZIP_DEFLATED
+            info.external_attr = 0o644 << 16
+            z.writestr(info, files[rel])
+    return buf.getvalue()
+
+
+def read_or_none(path):
+    try:
+        return pathlib.Path(path).read_bytes()
+    except OSError:
+        return None
+
+
+def write_atomic(path, data):
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def show_diff(rel, old, new):
+    if old is None:
+        print(f"new      {rel}")
+        return
+    print(f"changed  {rel}")
+    try:
+        a, b = old.decode("utf-8").splitlines(), new.decode("utf-8").splitlines()
+    except UnicodeDecodeError:
+        return
+    for line in list(difflib.unified_diff(a, b, f"disk/{rel}", f"generated/{rel}", lineterm="", n=1))[:40]:
+        print("    " + line)
+
+
+changed = {rel: data for rel, data in sorted(files.items()) if read_or_none(os.path.join(base, rel)) != data}
+stale = sorted(rel for rel in previous if rel not in files and os.path.exists(os.path.join(base, rel)))
+archive = zip_bytes(files)
+zip_changed = read_or_none(zip_path) != archive
+
+if args.check:
+    for rel, data in changed.items():
+        show_diff(rel, read_or_none(os.path.join(base, rel)), data)
+    for rel in stale:
+        print(f"stale    {rel}")
+    if zip_changed:
+        print(f"changed  {zip_path}")
+    sys.exit(1 if changed or stale or zip_changed else 0)
+
+for rel, data in changed.items():
+    path = os.path.join(base, rel)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    write_atomic(path, data)
+for rel in stale:
+    os.remove(os.path.join(base, rel))
+manifest = json.dumps({"files": {rel: sha256(data) for rel, data in sorted(files.items())},
+                       "assets": asset_sources}, indent=1) + "\n"
+if read_or_none(os.path.join(base, MANIFEST)) != manifest.encode("utf-8"):
+    write_atomic(os.path.join(base, MANIFEST), manifest.encode("utf-8"))
+if zip_changed:
+    write_atomic(zip_path, archive)
+print(f"{len(changed)} written, {len(stale)} removed, {len(files) - len(changed)} unchanged"
+      + (", zip updated" if zip_changed else ""))